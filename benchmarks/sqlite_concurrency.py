@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+SQLite并发读写基准测试
+
+在持续写入的同时测量读取吞吐量，对比默认参数（rollback journal）
+与生产参数（WAL、synchronous=NORMAL、busy_timeout等）的表现。
+
+用法:
+    python benchmarks/sqlite_concurrency.py --duration 5 --readers 4
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from poetry_app import create_app, db
+from poetry_app.models.poetry import Poetry
+
+PROFILES = {
+    'default': {
+        'SQLITE_JOURNAL_MODE': 'DELETE',
+        'SQLITE_SYNCHRONOUS': 'FULL',
+        'SQLITE_BUSY_TIMEOUT': None,
+        'SQLITE_MMAP_SIZE': None,
+        'SQLITE_CACHE_SIZE': None,
+    },
+    'tuned': {
+        'SQLITE_JOURNAL_MODE': Config.SQLITE_JOURNAL_MODE,
+        'SQLITE_SYNCHRONOUS': Config.SQLITE_SYNCHRONOUS,
+        'SQLITE_BUSY_TIMEOUT': Config.SQLITE_BUSY_TIMEOUT,
+        'SQLITE_MMAP_SIZE': Config.SQLITE_MMAP_SIZE,
+        'SQLITE_CACHE_SIZE': Config.SQLITE_CACHE_SIZE,
+    },
+}
+
+def run_profile(name, db_path, duration, readers, rows):
+    """运行单个参数组合，返回读写统计"""
+    config_class = type(f'{name.title()}Config', (Config,), dict(
+        PROFILES[name],
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI=f'sqlite:///{db_path}',
+    ))
+    app = create_app(config_class)
+
+    with app.app_context():
+        db.create_all()
+        db.session.bulk_save_objects([
+            Poetry(title=f'诗{i}', content='床前明月光，疑是地上霜。' * 4, author=f'作者{i % 50}')
+            for i in range(rows)
+        ])
+        db.session.commit()
+
+    stop = threading.Event()
+    stats = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+
+    def reader():
+        with app.app_context():
+            while not stop.is_set():
+                try:
+                    Poetry.query.order_by(Poetry.created_at.desc()).limit(20).all()
+                    db.session.rollback()
+                    with lock:
+                        stats['reads'] += 1
+                except Exception:
+                    db.session.rollback()
+                    with lock:
+                        stats['errors'] += 1
+
+    def writer():
+        with app.app_context():
+            i = 0
+            while not stop.is_set():
+                try:
+                    db.session.add(Poetry(title=f'新诗{i}', content='举头望明月，低头思故乡。'))
+                    db.session.commit()
+                    i += 1
+                    with lock:
+                        stats['writes'] += 1
+                except Exception:
+                    db.session.rollback()
+                    with lock:
+                        stats['errors'] += 1
+
+    threads = [threading.Thread(target=writer)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        db.engine.dispose()
+
+    return {
+        'reads_per_second': round(stats['reads'] / duration, 1),
+        'writes_per_second': round(stats['writes'] / duration, 1),
+        'errors': stats['errors'],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite并发读写基准测试')
+    parser.add_argument('--duration', type=float, default=5.0, help='每组测试持续秒数')
+    parser.add_argument('--readers', type=int, default=4, help='读线程数量')
+    parser.add_argument('--rows', type=int, default=2000, help='预置诗词数量')
+    args = parser.parse_args()
+
+    print(f"读线程 {args.readers}，写线程 1，持续 {args.duration} 秒，预置 {args.rows} 首诗词")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name in PROFILES:
+            result = run_profile(
+                name, os.path.join(tmpdir, f'{name}.db'), args.duration, args.readers, args.rows
+            )
+            print(
+                f"{name:>8}: 读 {result['reads_per_second']}/s，"
+                f"写 {result['writes_per_second']}/s，错误 {result['errors']}"
+            )
+
+if __name__ == '__main__':
+    main()
@@ -4,9 +4,97 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'your-secret-key-here'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///poetry.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    
+    # SQLite连接参数：WAL模式允许读写并发，busy_timeout避免"database is locked"
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))  # 毫秒
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))  # 字节
+    SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE', -64000))  # 负数表示KiB
+    
+    # 只读副本（逗号分隔），只读GET请求读取副本；写入后在 REPLICA_STICKY_SECONDS 内继续读取主库
+    SQLALCHEMY_REPLICA_URIS = [uri.strip() for uri in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if uri.strip()]
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 10))
+    
+    # 连接池参数（PostgreSQL/MySQL）
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # 秒
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
     UPLOAD_FOLDER = 'static/images'
     GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
     
+    # Gemini 调用熔断：连续失败次数阈值，熔断后等待多少秒再放行探测请求
+    GEMINI_BREAKER_FAILURE_THRESHOLD = int(os.environ.get('GEMINI_BREAKER_FAILURE_THRESHOLD', 5))
+    GEMINI_BREAKER_RECOVERY_TIMEOUT = int(os.environ.get('GEMINI_BREAKER_RECOVERY_TIMEOUT', 60))
+    
+    # 图片生成调用记录：后台批量写入的批大小、最长间隔（秒）和队列上限
+    GENERATION_LEDGER_ASYNC = os.environ.get('GENERATION_LEDGER_ASYNC', 'true').lower() == 'true'
+    GENERATION_LEDGER_BATCH_SIZE = int(os.environ.get('GENERATION_LEDGER_BATCH_SIZE', 100))
+    GENERATION_LEDGER_FLUSH_INTERVAL = float(os.environ.get('GENERATION_LEDGER_FLUSH_INTERVAL', 2.0))
+    GENERATION_LEDGER_MAX_QUEUE = int(os.environ.get('GENERATION_LEDGER_MAX_QUEUE', 10000))
+    
+    # JSON序列化后端：orjson（未安装时自动回退）或 json
+    JSON_BACKEND = os.environ.get('JSON_BACKEND', 'orjson')
+    
+    # 每首诗词最多生成的标签数量
+    TAG_MAX_PER_POEM = int(os.environ.get('TAG_MAX_PER_POEM', 40))
+    
+    # 相似诗词索引：特征哈希维度和索引文件目录（默认 instance/similarity）
+    SIMILARITY_DIM = int(os.environ.get('SIMILARITY_DIM', 1024))
+    SIMILARITY_INDEX_DIR = os.environ.get('SIMILARITY_INDEX_DIR')
+    
+    # 搜索建议前缀索引：最大条目数和重建间隔（秒）
+    SUGGEST_MAX_ENTRIES = int(os.environ.get('SUGGEST_MAX_ENTRIES', 50000))
+    SUGGEST_INDEX_TTL = int(os.environ.get('SUGGEST_INDEX_TTL', 300))
+    
+    # 批量删除/更新接口单次最多处理的诗词数量
+    BULK_MAX_ITEMS = int(os.environ.get('BULK_MAX_ITEMS', 1000))
+    
+    # 图片文件后台清理：定期检查间隔（秒）和每批处理数量
+    IMAGE_SWEEPER_ENABLED = os.environ.get('IMAGE_SWEEPER_ENABLED', 'true').lower() == 'true'
+    IMAGE_SWEEP_INTERVAL = int(os.environ.get('IMAGE_SWEEP_INTERVAL', 60))
+    IMAGE_SWEEP_BATCH_SIZE = int(os.environ.get('IMAGE_SWEEP_BATCH_SIZE', 500))
+    
+    # 生产服务器（python main.py serve）：worker 数量为0时按 CPU 核数*2+1，
+    # worker 类型 gthread/gevent/sync；每个 worker 处理 MAX_REQUESTS 个请求后自动替换
+    SERVER_BIND = os.environ.get('SERVER_BIND', '0.0.0.0:8000')
+    SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS', 0))
+    SERVER_WORKER_CLASS = os.environ.get('SERVER_WORKER_CLASS', 'gthread')
+    SERVER_THREADS = int(os.environ.get('SERVER_THREADS', 4))
+    SERVER_WORKER_CONNECTIONS = int(os.environ.get('SERVER_WORKER_CONNECTIONS', 1000))
+    SERVER_MAX_REQUESTS = int(os.environ.get('SERVER_MAX_REQUESTS', 1000))
+    SERVER_MAX_REQUESTS_JITTER = int(os.environ.get('SERVER_MAX_REQUESTS_JITTER', 100))
+    SERVER_TIMEOUT = int(os.environ.get('SERVER_TIMEOUT', 120))  # 秒，需覆盖图片生成的耗时
+    SERVER_GRACEFUL_TIMEOUT = int(os.environ.get('SERVER_GRACEFUL_TIMEOUT', 30))
+    SERVER_KEEPALIVE = int(os.environ.get('SERVER_KEEPALIVE', 5))
+    SERVER_PIDFILE = os.environ.get('SERVER_PIDFILE')
+    SERVER_ACCESS_LOG = os.environ.get('SERVER_ACCESS_LOG')
+    
+    # 生成配图接口限流：每个客户端（按IP或会话）在滑动窗口内最多提交的次数，
+    # 计数保存在本地 SQLite 文件中（默认 instance/rate_limits.db），所有 worker 共享
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_KEY = os.environ.get('RATE_LIMIT_KEY', 'ip')  # ip 或 session
+    RATE_LIMIT_STORAGE_PATH = os.environ.get('RATE_LIMIT_STORAGE_PATH')
+    RATE_LIMIT_WINDOW = int(os.environ.get('RATE_LIMIT_WINDOW', 3600))  # 秒
+    RATE_LIMITS = {
+        'poetry.create': (int(os.environ.get('RATE_LIMIT_CREATE', 20)), RATE_LIMIT_WINDOW),
+        'poetry.edit': (int(os.environ.get('RATE_LIMIT_EDIT', 30)), RATE_LIMIT_WINDOW),
+        'poetry.regenerate_image': (int(os.environ.get('RATE_LIMIT_REGENERATE', 20)), RATE_LIMIT_WINDOW),
+    }
+    
+    # 反向代理层数：部署在 Nginx 等代理之后时设为1，按 X-Forwarded-For 识别客户端IP
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 0))
+    
+    # 管理接口令牌，未设置时管理接口拒绝所有请求
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+    
+    # 配图批量补全
+    BACKFILL_CONCURRENCY = int(os.environ.get('BACKFILL_CONCURRENCY', 2))
+    BACKFILL_MAX_CONCURRENCY = int(os.environ.get('BACKFILL_MAX_CONCURRENCY', 8))  # 接口和命令行指定的并发数上限
+    BACKFILL_QUOTA_BUDGET = int(os.environ['BACKFILL_QUOTA_BUDGET']) if os.environ.get('BACKFILL_QUOTA_BUDGET') else None
+    BACKFILL_CHECKPOINT_PATH = os.environ.get('BACKFILL_CHECKPOINT_PATH')
+    
     # 确保上传文件夹存在
     @staticmethod
     def init_app(app):
@@ -5,7 +5,6 @@
 
 import os
 import sys
-from poetry_app import create_app, db
 
 # 加载.env文件
 try:
@@ -21,6 +20,42 @@ except ImportError:
                     key, value = line.split('=', 1)
                     os.environ[key.strip()] = value.strip()
 
+# gevent worker 需要在导入 ssl、httpx 等模块之前打补丁：应用在主进程中预加载，
+# 等到 worker 启动时再打补丁已经太晚，因此在导入应用之前完成
+if len(sys.argv) > 1 and sys.argv[1] == 'serve' and os.environ.get('SERVER_WORKER_CLASS') == 'gevent':
+    try:
+        from gevent import monkey
+        monkey.patch_all()
+    except ImportError:
+        # 由 gunicorn_options 给出需要安装 gevent 的错误
+        pass
+
+from poetry_app import create_app, db
+from poetry_app.server import run_server
+from poetry_app.services.author_service import AuthorService
+from poetry_app.services.similarity_service import get_similarity_index
+from poetry_app.utils.migrations import upgrade_schema
+
+def init_database(app):
+    """创建数据库表并升级结构"""
+    with app.app_context():
+        db.create_all()
+        upgrade_schema(db)
+        AuthorService().backfill()
+        print("✅ 数据库初始化完成")
+        
+        # 相似诗词索引只在启动时构建一次，之后随诗词变更增量更新
+        index = get_similarity_index()
+        if index.available and not index.exists():
+            index.build()
+            print("✅ 相似度索引构建完成")
+
+def serve():
+    """使用生产服务器（Gunicorn）启动应用"""
+    app = create_app()
+    init_database(app)
+    run_server(app)
+
 def main():
     """主函数"""
     print("🎨 诗歌创作平台启动中...")
@@ -33,11 +68,8 @@ def main():
     
     # 创建应用
     app = create_app()
-    
-    # 创建数据库表
-    with app.app_context():
-        db.create_all()
-        print("✅ 数据库初始化完成")
+    init_database(app)
+    app.extensions['image_sweeper'].start()
     
     # 启动应用
     print("🚀 应用启动成功!")
@@ -50,4 +82,7 @@ def main():
         print("\n👋 应用已停止")
 
 if __name__ == '__main__':
-    main()
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        serve()
+    else:
+        main()
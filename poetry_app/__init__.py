@@ -5,9 +5,10 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from config import Config
+from poetry_app.utils.database import RoutingSession
 
 # 初始化扩展
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 def create_app(config_class=Config):
     """应用工厂函数"""
@@ -20,8 +21,26 @@ def create_app(config_class=Config):
                 static_folder=os.path.join(basedir, 'static'))
     app.config.from_object(config_class)
     
+    # 部署在反向代理之后时使用代理转发的客户端IP
+    if app.config.get('PROXY_FIX_X_FOR'):
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'],
+                                x_proto=app.config['PROXY_FIX_X_FOR'])
+    
+    # JSON序列化（优先使用orjson）
+    from poetry_app.utils.json_provider import FastJSONProvider
+    app.json = FastJSONProvider(app)
+    
     # 初始化扩展
+    from poetry_app.utils.database import (
+        configure_engine_options, configure_replica_binds,
+        apply_sqlite_pragmas, register_read_write_routing
+    )
+    configure_engine_options(app)
+    configure_replica_binds(app)
     db.init_app(app)
+    apply_sqlite_pragmas(app, db)
+    register_read_write_routing(app, db)
     
     # 确保上传文件夹存在
     import os
@@ -31,9 +50,35 @@ def create_app(config_class=Config):
     from poetry_app.routes.main import main_bp
     from poetry_app.routes.poetry import poetry_bp
     from poetry_app.routes.api import api_bp
+    from poetry_app.routes.admin import admin_bp
     
     app.register_blueprint(main_bp)
     app.register_blueprint(poetry_bp, url_prefix='/poetry')
     app.register_blueprint(api_bp, url_prefix='/api')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    
+    # 进程内索引（随诗词变更增量更新）
+    from poetry_app.services.similarity_service import init_similarity_index
+    from poetry_app.services.suggest_service import init_suggest_index
+    init_similarity_index(app)
+    init_suggest_index(app)
+    
+    # 图片生成服务熔断器和调用记录（进程内共享）
+    from poetry_app.services.ai_service import init_gemini_breaker
+    from poetry_app.services.generation_ledger import init_generation_ledger
+    init_gemini_breaker(app)
+    init_generation_ledger(app)
+    
+    # 生成配图接口限流（worker 间共享计数）
+    from poetry_app.services.rate_limit_service import init_rate_limiter
+    init_rate_limiter(app)
+    
+    # 图片文件后台清理（删除诗词、替换配图后）
+    from poetry_app.services.image_sweeper import init_image_sweeper
+    init_image_sweeper(app)
+    
+    # 注册命令行命令
+    from poetry_app.commands import register_commands
+    register_commands(app)
     
     return app
@@ -0,0 +1,97 @@
+"""
+命令行工具（通过 flask 命令调用）
+"""
+
+import click
+
+
+def register_commands(app):
+    """注册命令行命令"""
+
+    @app.cli.command('backfill-images')
+    @click.option('--concurrency', type=int, default=None, help='并发生成数量')
+    @click.option('--budget', type=int, default=None, help='本次最多调用图片生成的次数')
+    @click.option('--reset', is_flag=True, help='忽略检查点，从头开始扫描')
+    def backfill_images(concurrency, budget, reset):
+        """为缺少配图的诗词批量生成配图"""
+        from poetry_app.services.backfill_service import ImageBackfillService
+
+        def report(progress):
+            eta = progress['eta_seconds']
+            click.echo(
+                f"进度 {progress['processed']}/{progress['total']} "
+                f"成功 {progress['succeeded']} 失败 {progress['failed']} "
+                f"速度 {progress['throughput_per_minute']} 首/分钟 "
+                f"预计剩余 {eta if eta is not None else '-'} 秒"
+            )
+
+        service = ImageBackfillService()
+        try:
+            result = service.run(
+                concurrency=concurrency, budget=budget, reset=reset, progress_callback=report
+            )
+        except KeyboardInterrupt:
+            click.echo("⚠️  已中断，下次运行将从检查点继续")
+            return
+
+        click.echo(
+            f"✅ 补全结束（{result['status']}）: 成功 {result['succeeded']}，"
+            f"失败 {result['failed']}，耗时 {result['elapsed_seconds']} 秒"
+        )
+
+    @app.cli.command('rebuild-tags')
+    def rebuild_tags():
+        """为所有诗词重新生成标签索引"""
+        from poetry_app.services.tag_service import TagService
+
+        total = TagService().rebuild_all()
+        click.echo(f"✅ 已为 {total} 首诗词生成标签")
+
+    @app.cli.command('sweep-images')
+    def sweep_images():
+        """立即删除所有待删除记录对应的图片文件"""
+        from poetry_app.services.image_sweeper import get_image_sweeper
+
+        sweeper = get_image_sweeper()
+        total = 0
+        while True:
+            removed = sweeper.sweep()
+            total += removed
+            if removed < sweeper.batch_size:
+                break
+        click.echo(f"✅ 已处理 {total} 条待删除图片记录")
+
+    @app.cli.command('migrate-authors')
+    def migrate_authors():
+        """升级数据库结构，并根据已有诗词补全作者表和作者诗词数量"""
+        from poetry_app import db
+        from poetry_app.services.author_service import AuthorService
+        from poetry_app.utils.migrations import upgrade_schema
+
+        db.create_all()
+        for column in upgrade_schema(db):
+            click.echo(f"已新增列: {column}")
+        total = AuthorService().backfill()
+        click.echo(f"✅ 已为 {total} 首诗词关联作者")
+
+    @app.cli.command('serve', with_appcontext=False)
+    @click.option('--bind', default=None, help='监听地址，如 0.0.0.0:8000')
+    @click.option('--workers', type=int, default=None, help='worker 进程数量')
+    @click.option('--worker-class', default=None, type=click.Choice(['gthread', 'gevent', 'sync']), help='worker 类型')
+    @click.option('--threads', type=int, default=None, help='gthread worker 的线程数')
+    def serve(bind, workers, worker_class, threads):
+        """使用生产服务器（Gunicorn）启动应用"""
+        from poetry_app.server import run_server
+
+        try:
+            run_server(app, bind=bind, workers=workers, worker_class=worker_class, threads=threads)
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+
+    @app.cli.command('build-similarity-index')
+    def build_similarity_index():
+        """全量构建相似诗词索引（刷新IDF并压缩已删除的行）"""
+        from poetry_app.services.similarity_service import get_similarity_index
+
+        total = get_similarity_index().build()
+        click.echo(f"✅ 相似度索引构建完成: {total} 首诗词")
@@ -2,6 +2,10 @@
 数据模型包
 """
 
+from .author import Author
+from .generation_attempt import GenerationAttempt
+from .image_tombstone import ImageTombstone
 from .poetry import Poetry
+from .tag import Tag, poetry_tags
 
-__all__ = ['Poetry']
+__all__ = ['Author', 'GenerationAttempt', 'ImageTombstone', 'Poetry', 'Tag', 'poetry_tags']
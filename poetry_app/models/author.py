@@ -0,0 +1,31 @@
+"""
+作者数据模型
+"""
+
+from datetime import datetime
+from poetry_app import db
+
+class Author(db.Model):
+    """作者模型"""
+    __tablename__ = 'authors'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False, unique=True, index=True, comment='作者名')
+    # 由 AuthorService 在诗词写入时维护，避免统计时扫描诗词表
+    poem_count = db.Column(db.Integer, nullable=False, default=0, server_default='0', comment='诗词数量')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, comment='创建时间')
+    
+    __table_args__ = (
+        db.Index('ix_authors_poem_count', 'poem_count'),
+    )
+    
+    def __repr__(self):
+        return f'<Author {self.name}>'
+    
+    def to_dict(self):
+        """转换为字典格式"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'poem_count': self.poem_count
+        }
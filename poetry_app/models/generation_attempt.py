@@ -0,0 +1,25 @@
+"""
+图片生成调用记录模型
+"""
+
+from poetry_app import db
+
+class GenerationAttempt(db.Model):
+    """图片生成调用记录（每次调用 Gemini 一条，重试各记一条）"""
+    __tablename__ = 'generation_attempts'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    prompt_hash = db.Column(db.String(64), nullable=False, index=True, comment='提示词SHA-256')
+    model = db.Column(db.String(100), nullable=False, comment='模型名称')
+    started_at = db.Column(db.DateTime, nullable=False, index=True, comment='开始时间（UTC）')
+    finished_at = db.Column(db.DateTime, nullable=False, comment='结束时间（UTC）')
+    duration_ms = db.Column(db.Float, nullable=False, comment='耗时（毫秒）')
+    bytes_received = db.Column(db.Integer, nullable=False, default=0, comment='收到的图片字节数')
+    retry_count = db.Column(db.Integer, nullable=False, default=0, comment='本次为第几次重试，首次为0')
+    success = db.Column(db.Boolean, nullable=False, comment='是否生成了图片')
+    error_class = db.Column(db.String(100), comment='失败时的异常类名')
+    quota_limited = db.Column(db.Boolean, nullable=False, default=False, comment='是否因配额限制失败')
+    waited_seconds = db.Column(db.Float, nullable=False, default=0, comment='本次调用前因配额限制等待的秒数')
+    
+    def __repr__(self):
+        return f'<GenerationAttempt {self.id} {self.model}>'
@@ -0,0 +1,22 @@
+"""
+待删除图片记录模型
+"""
+
+from datetime import datetime
+from poetry_app import db
+
+class ImageTombstone(db.Model):
+    """待删除图片记录
+
+    删除诗词或替换配图时，与诗词变更在同一事务中写入，
+    提交后由 ImageSweeper 删除文件并移除记录。回滚时记录随之消失，文件保留；
+    进程在提交后、删除文件前退出时，记录仍在，下次清理时继续处理。
+    """
+    __tablename__ = 'image_tombstones'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    image_path = db.Column(db.String(500), nullable=False, comment='待删除的图片文件名')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, comment='创建时间')
+    
+    def __repr__(self):
+        return f'<ImageTombstone {self.image_path}>'
@@ -4,6 +4,7 @@
 
 from datetime import datetime
 from poetry_app import db
+from poetry_app.models.author import Author
 
 class Poetry(db.Model):
     """诗词模型"""
@@ -13,11 +14,23 @@ class Poetry(db.Model):
     title = db.Column(db.String(200), nullable=False, comment='诗词标题')
     content = db.Column(db.Text, nullable=False, comment='诗词内容')
     author = db.Column(db.String(100), default='匿名', comment='作者')
+    # 与 author 同步，由 AuthorService 在 flush 时根据作者名设置
+    author_id = db.Column(db.Integer, db.ForeignKey('authors.id'), index=True, comment='作者ID')
     created_at = db.Column(db.DateTime, default=datetime.utcnow, comment='创建时间')
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, comment='更新时间')
+    # 有索引：诗词列表的 ETag 取 max(updated_at)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True, comment='更新时间')
     image_path = db.Column(db.String(500), comment='配图路径')
     image_prompt = db.Column(db.Text, comment='图片生成提示词')
     
+    # 写入时由 TagService 根据标题和内容生成
+    tags = db.relationship('Tag', secondary='poetry_tags', lazy='select')
+    
+    # 内容预览，仅在列表查询中通过 with_expression 加载（见 PoetryService）
+    preview = db.query_expression()
+    
+    # to_dict() 输出的字段，也用于列表接口直接查询列
+    DICT_FIELDS = ('id', 'title', 'content', 'author', 'author_id', 'created_at', 'updated_at', 'image_path', 'image_prompt')
+    
     def __repr__(self):
         return f'<Poetry {self.title}>'
     
@@ -28,6 +41,7 @@ class Poetry(db.Model):
             'title': self.title,
             'content': self.content,
             'author': self.author,
+            'author_id': self.author_id,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'image_path': self.image_path,
@@ -48,3 +62,9 @@ class Poetry(db.Model):
     def search_by_author(cls, author):
         """根据作者搜索诗词"""
         return cls.query.filter(cls.author.contains(author)).all()
+    
+    @classmethod
+    def get_by_author(cls, author):
+        """根据作者名精确查找诗词（通过作者表和 author_id 索引）"""
+        author_ids = db.select(Author.id).where(Author.name == author)
+        return cls.query.filter(cls.author_id.in_(author_ids)).order_by(cls.id.desc()).all()
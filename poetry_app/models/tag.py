@@ -0,0 +1,23 @@
+"""
+标签数据模型
+"""
+
+from poetry_app import db
+
+# 诗词与标签的关联表，(tag_id, poetry_id) 索引即标签的倒排索引
+poetry_tags = db.Table(
+    'poetry_tags',
+    db.Column('poetry_id', db.Integer, db.ForeignKey('poetry.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('tag_id', db.Integer, db.ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_poetry_tags_tag_poetry', 'tag_id', 'poetry_id'),
+)
+
+class Tag(db.Model):
+    """标签模型"""
+    __tablename__ = 'tags'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False, unique=True, index=True, comment='标签名')
+    
+    def __repr__(self):
+        return f'<Tag {self.name}>'
@@ -0,0 +1,207 @@
+"""
+管理接口路由
+"""
+
+import hmac
+import threading
+from functools import wraps
+from flask import Blueprint, jsonify, request, current_app
+from poetry_app import db
+from poetry_app.services.backfill_service import ImageBackfillService
+from poetry_app.services.generation_ledger import get_generation_ledger
+from poetry_app.services.poetry_service import PoetryService
+
+admin_bp = Blueprint('admin', __name__)
+backfill_service = ImageBackfillService()
+poetry_service = PoetryService()
+
+def admin_required(view):
+    """校验管理令牌；未配置 ADMIN_TOKEN 时拒绝所有请求
+
+    部署在反向代理之后时所有请求都来自本机，不能按来源地址放行。
+    未配置令牌时请使用 flask backfill-images / sweep-images 等命令行工具。
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = current_app.config.get('ADMIN_TOKEN')
+        if not token:
+            return jsonify({
+                'success': False,
+                'error': '管理接口未启用（未设置 ADMIN_TOKEN），请使用 flask backfill-images、flask sweep-images 等命令行工具'
+            }), 403
+
+        provided = request.headers.get('X-Admin-Token', '')
+        if not hmac.compare_digest(provided.encode(), token.encode()):
+            return jsonify({
+                'success': False,
+                'error': '无权访问管理接口'
+            }), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+@admin_bp.route('/backfill-images', methods=['POST'])
+@admin_required
+def start_backfill():
+    """启动配图批量补全任务（后台运行）"""
+    if backfill_service.is_running:
+        return jsonify({
+            'success': False,
+            'error': '已有补全任务正在运行',
+            'data': backfill_service.progress
+        }), 409
+
+    data = request.get_json(silent=True) or {}
+    try:
+        options = {
+            'concurrency': _positive_int(data, 'concurrency'),
+            'budget': _positive_int(data, 'budget'),
+            'reset': data.get('reset', False),
+        }
+        if not isinstance(options['reset'], bool):
+            raise ValueError('reset 必须是布尔值')
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    if options['concurrency'] is not None:
+        options['concurrency'] = min(options['concurrency'], current_app.config.get('BACKFILL_MAX_CONCURRENCY', 8))
+    app = current_app._get_current_object()
+
+    def run():
+        with app.app_context():
+            try:
+                backfill_service.run(**options)
+            except Exception as e:
+                app.logger.error(f"配图补全任务失败: {e}")
+
+    threading.Thread(target=run, name='image-backfill', daemon=True).start()
+    return jsonify({
+        'success': True,
+        'message': '补全任务已启动'
+    }), 202
+
+@admin_bp.route('/backfill-images', methods=['GET'])
+@admin_required
+def backfill_status():
+    """查询配图补全进度"""
+    return jsonify({
+        'success': True,
+        'data': backfill_service.progress
+    })
+
+@admin_bp.route('/backfill-images', methods=['DELETE'])
+@admin_required
+def stop_backfill():
+    """停止配图补全任务，已完成的批次会保留在检查点中"""
+    backfill_service.stop()
+    return jsonify({
+        'success': True,
+        'message': '已请求停止，当前批次完成后生效'
+    })
+
+@admin_bp.route('/generation-stats')
+@admin_required
+def generation_stats():
+    """图片生成调用统计：延迟百分位、成功率、重试率和配额等待，按时间分桶"""
+    hours = min(max(request.args.get('hours', 24, type=int), 1), 24 * 90)
+    bucket_minutes = min(max(request.args.get('bucket_minutes', 60, type=int), 1), 24 * 60)
+
+    ledger = get_generation_ledger()
+    # 先写入队列中尚未落库的记录
+    ledger.flush()
+    data = ledger.summarize(hours, bucket_minutes)
+    data['dropped'] = ledger.dropped
+
+    return jsonify({
+        'success': True,
+        'data': data
+    })
+
+def _positive_int(data, key):
+    """读取请求体中可选的正整数参数，未提供时返回None，格式不对时抛出 ValueError"""
+    value = data.get(key)
+    if value is None:
+        return None
+    # JSON 的 true/false 在 Python 中也是 int，需要排除
+    if type(value) is not int or value < 1:
+        raise ValueError(f'{key} 必须是正整数')
+    return value
+
+def _bulk_items(key):
+    """读取批量请求中的列表，超过 BULK_MAX_ITEMS 时抛出 ValueError"""
+    data = request.get_json(silent=True) or {}
+    items = data.get(key)
+    if not isinstance(items, list) or not items:
+        raise ValueError(f'请求体需要非空的 {key} 列表')
+    limit = current_app.config.get('BULK_MAX_ITEMS', 1000)
+    if len(items) > limit:
+        raise ValueError(f'单次最多处理 {limit} 项')
+    return items
+
+@admin_bp.route('/poems/bulk-delete', methods=['POST'])
+@admin_required
+def bulk_delete():
+    """批量删除诗词（单个事务），图片文件在提交后由后台清理"""
+    try:
+        poetry_ids = _bulk_items('ids')
+        # JSON 的 true/false 在 Python 中也是 int，需要排除
+        if not all(type(poetry_id) is int for poetry_id in poetry_ids):
+            raise ValueError('ids 只能包含整数')
+        
+        deleted = poetry_service.delete_poems(poetry_ids)
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'deleted': deleted,
+                'not_found': sorted(set(poetry_ids) - set(deleted))
+            },
+            'count': len(deleted)
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@admin_bp.route('/poems/bulk-update', methods=['POST'])
+@admin_required
+def bulk_update():
+    """批量更新诗词（单个事务，全部成功或全部不生效）"""
+    try:
+        updates = _bulk_items('updates')
+        missing = poetry_service.update_poems(updates)
+        if missing:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'error': '部分诗词不存在，未做任何修改',
+                'data': {'not_found': missing}
+            }), 404
+        
+        db.session.commit()
+        return jsonify({
+            'success': True,
+            'count': len({item['id'] for item in updates})
+        })
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
@@ -2,23 +2,64 @@
 API接口路由
 """
 
-from flask import Blueprint, jsonify, request
+import hashlib
+import time
+from flask import Blueprint, current_app, jsonify, request
+from poetry_app.services.ai_service import get_gemini_breaker
+from poetry_app.services.author_service import AuthorService
 from poetry_app.services.poetry_service import PoetryService
+from poetry_app.services.tag_service import TagService
+from poetry_app.services.similarity_service import get_similarity_index
+from poetry_app.services.suggest_service import get_suggest_index
+from poetry_app.utils.database import use_replica_for_reads
 from poetry_app.models.poetry import Poetry
 
 api_bp = Blueprint('api', __name__)
+api_bp.before_request(use_replica_for_reads)
 poetry_service = PoetryService()
+tag_service = TagService()
+author_service = AuthorService()
+
+def _version_etag(*parts):
+    """根据诗词版本（更新时间）和请求参数生成ETag"""
+    return hashlib.md5(repr(parts).encode('utf-8')).hexdigest()
+
+def _not_modified(etag):
+    """客户端缓存的版本仍然有效时返回304响应，否则返回None"""
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def _with_etag(response, etag):
+    """设置ETag，浏览器和 Service Worker 每次使用缓存前都需要重新验证"""
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @api_bp.route('/poems')
 def get_poems():
-    """获取所有诗词的JSON数据"""
+    """获取所有诗词的JSON数据（支持 If-None-Match）"""
     try:
-        poems = poetry_service.get_all_poems()
-        return jsonify({
+        fields = poetry_service.parse_fields(request.args.get('fields'))
+        etag = _version_etag(poetry_service.get_poems_version(), fields)
+        not_modified = _not_modified(etag)
+        if not_modified:
+            return not_modified
+        
+        poems = poetry_service.get_all_poem_rows(fields)
+        return _with_etag(jsonify({
             'success': True,
-            'data': [poem.to_dict() for poem in poems],
+            'data': poems,
             'count': len(poems)
-        })
+        }), etag)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -27,19 +68,85 @@ def get_poems():
 
 @api_bp.route('/poems/<int:id>')
 def get_poem(id):
-    """获取单个诗词的JSON数据"""
+    """获取单个诗词的JSON数据（支持 If-None-Match）"""
     try:
-        poetry = poetry_service.get_poetry_by_id(id)
-        if not poetry:
+        fields = poetry_service.parse_fields(request.args.get('fields'))
+        version = poetry_service.get_poem_version(id)
+        if version is None:
             return jsonify({
                 'success': False,
                 'error': '诗词不存在'
             }), 404
         
+        # 内容未修改时不再读取诗词
+        etag = _version_etag(id, version, fields)
+        not_modified = _not_modified(etag)
+        if not_modified:
+            return not_modified
+        
+        if fields:
+            data = poetry_service.get_poem_row(id, fields)
+        else:
+            poetry = poetry_service.get_poetry_by_id(id)
+            data = poetry.to_dict() if poetry else None
+        
+        if not data:
+            return jsonify({
+                'success': False,
+                'error': '诗词不存在'
+            }), 404
+        
+        return _with_etag(jsonify({
+            'success': True,
+            'data': data
+        }), etag)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@api_bp.route('/poems/<int:id>/similar')
+def get_similar_poems(id):
+    """获取相似诗词"""
+    try:
+        k = min(max(request.args.get('k', 5, type=int), 1), 50)
+        fields = poetry_service.parse_fields(request.args.get('fields'))
+        
+        index = get_similarity_index()
+        if not index.available:
+            return jsonify({
+                'success': False,
+                'error': '相似诗词功能不可用（未安装numpy）'
+            }), 503
+        if not index.exists():
+            return jsonify({
+                'success': False,
+                'error': '相似诗词索引尚未构建，请运行 flask --app main build-similarity-index'
+            }), 503
+        
+        similar = index.similar(id, k)
+        poems = poetry_service.get_poem_rows_by_ids([poem_id for poem_id, _ in similar], fields)
+        scores = dict(similar)
+        if not fields or 'id' in fields:
+            for poem in poems:
+                poem['score'] = scores[poem['id']]
+        
         return jsonify({
             'success': True,
-            'data': poetry.to_dict()
+            'data': poems,
+            'count': len(poems)
         })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -57,13 +164,19 @@ def search_poems():
                 'error': '搜索关键词不能为空'
             }), 400
         
-        poems = poetry_service.search_poems(keyword)
+        fields = poetry_service.parse_fields(request.args.get('fields'))
+        poems = poetry_service.search_poem_rows(keyword, fields)
         return jsonify({
             'success': True,
-            'data': [poem.to_dict() for poem in poems],
+            'data': poems,
             'count': len(poems),
             'keyword': keyword
         })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -75,13 +188,156 @@ def get_recent_poems():
     """获取最近的诗词"""
     try:
         limit = request.args.get('limit', 10, type=int)
-        poems = Poetry.get_recent_poems(limit)
+        fields = poetry_service.parse_fields(request.args.get('fields'))
+        poems = poetry_service.get_recent_poem_rows(limit, fields)
         
         return jsonify({
             'success': True,
-            'data': [poem.to_dict() for poem in poems],
+            'data': poems,
             'count': len(poems)
         })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@api_bp.route('/suggest')
+def suggest():
+    """搜索建议：匹配标题或作者前缀"""
+    try:
+        started = time.perf_counter()
+        prefix = request.args.get('q', '').strip()
+        limit = min(max(request.args.get('limit', 8, type=int), 1), 20)
+        suggestions = get_suggest_index().suggest(prefix, limit)
+        
+        return jsonify({
+            'success': True,
+            'data': suggestions,
+            'count': len(suggestions),
+            'took_ms': round((time.perf_counter() - started) * 1000, 3)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@api_bp.route('/tags')
+def get_tags():
+    """获取标签统计（按诗词数量降序）"""
+    try:
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+        tags = tag_service.get_facets(limit)
+        
+        return jsonify({
+            'success': True,
+            'data': tags,
+            'count': len(tags)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@api_bp.route('/tags/<tag>')
+def get_poems_by_tag(tag):
+    """按标签获取诗词（分页）"""
+    try:
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+        fields = poetry_service.parse_fields(request.args.get('fields'))
+        
+        tag_id = tag_service.get_tag_id(tag)
+        if tag_id is None:
+            poems, total = [], 0
+        else:
+            poems = poetry_service.get_poem_rows_page(
+                tag_service.poems_condition(tag_id), page, per_page, fields
+            )
+            total = tag_service.count_poems(tag_id)
+        
+        return jsonify({
+            'success': True,
+            'data': poems,
+            'count': len(poems),
+            'total': total,
+            'page': page,
+            'per_page': per_page,
+            'tag': tag
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@api_bp.route('/authors')
+def get_authors():
+    """获取作者列表（按诗词数量降序，分页）"""
+    try:
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+        authors = author_service.get_authors_page(page, per_page)
+        
+        return jsonify({
+            'success': True,
+            'data': authors,
+            'count': len(authors),
+            'total': author_service.count_authors(),
+            'page': page,
+            'per_page': per_page
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@api_bp.route('/authors/<int:author_id>/poems')
+def get_poems_by_author(author_id):
+    """按作者获取诗词（分页）"""
+    try:
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+        fields = poetry_service.parse_fields(request.args.get('fields'))
+        
+        author = author_service.get_author(author_id)
+        if not author:
+            return jsonify({
+                'success': False,
+                'error': '作者不存在'
+            }), 404
+        
+        poems = poetry_service.get_poem_rows_page(
+            author_service.poems_condition(author_id), page, per_page, fields
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': poems,
+            'count': len(poems),
+            'total': author['poem_count'],
+            'page': page,
+            'per_page': per_page,
+            'author': author
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -93,7 +349,7 @@ def get_stats():
     """获取统计信息"""
     try:
         total_poems = Poetry.query.count()
-        total_authors = Poetry.query.with_entities(Poetry.author).distinct().count()
+        total_authors = author_service.count_authors()
         poems_with_images = Poetry.query.filter(Poetry.image_path.isnot(None)).count()
         
         return jsonify({
@@ -102,7 +358,8 @@ def get_stats():
                 'total_poems': total_poems,
                 'total_authors': total_authors,
                 'poems_with_images': poems_with_images,
-                'image_coverage': round(poems_with_images / total_poems * 100, 2) if total_poems > 0 else 0
+                'image_coverage': round(poems_with_images / total_poems * 100, 2) if total_poems > 0 else 0,
+                'image_service': get_gemini_breaker().snapshot()
             }
         })
     except Exception as e:
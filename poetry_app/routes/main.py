@@ -2,23 +2,30 @@
 主页面路由
 """
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+import os
+from flask import (
+    Blueprint, render_template, stream_template, request, redirect, url_for, flash,
+    get_flashed_messages, send_from_directory, current_app
+)
+from poetry_app.services.ai_service import get_gemini_breaker
 from poetry_app.services.poetry_service import PoetryService
+from poetry_app.utils.database import use_replica_for_reads
 
 main_bp = Blueprint('main', __name__)
+main_bp.before_request(use_replica_for_reads)
 poetry_service = PoetryService()
 
 @main_bp.route('/')
 def index():
-    """首页 - 显示所有诗词"""
+    """首页 - 显示所有诗词（流式输出，边查询边发送）"""
     search_keyword = request.args.get('search', '')
+    poems = poetry_service.iter_poems(search_keyword, list_view=True)
     
-    if search_keyword:
-        poems = poetry_service.search_poems(search_keyword)
-    else:
-        poems = poetry_service.get_all_poems()
+    # 流式响应的会话 cookie 在输出页面前已经发送，闪现消息需要提前取出
+    get_flashed_messages()
     
-    return render_template('index.html', poems=poems, search_keyword=search_keyword)
+    # 关闭 Nginx 对该响应的缓冲，页面头部和前几张卡片可以先到达浏览器
+    return stream_template('index.html', poems=poems, search_keyword=search_keyword), {'X-Accel-Buffering': 'no'}
 
 @main_bp.route('/about')
 def about():
@@ -28,4 +35,15 @@ def about():
 @main_bp.route('/api-status')
 def api_status():
     """API状态检查页面"""
-    return render_template('api_status.html')
+    return render_template('api_status.html', breaker=get_gemini_breaker().snapshot())
+
+@main_bp.route('/sw.js')
+def service_worker():
+    """Service Worker 脚本（从根路径提供，作用域覆盖整个站点）"""
+    response = send_from_directory(
+        os.path.join(current_app.static_folder, 'js'), 'sw.js', mimetype='application/javascript'
+    )
+    response.headers['Service-Worker-Allowed'] = '/'
+    # 每次导航时浏览器都会检查脚本是否更新
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
@@ -2,8 +2,10 @@
 诗词相关路由
 """
 
-from flask import Blueprint, render_template, request, redirect, url_for, send_file, flash, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, send_file, flash, jsonify, current_app
 from poetry_app.services.poetry_service import PoetryService
+from poetry_app.services.rate_limit_service import check_rate_limit
+from poetry_app.services.similarity_service import get_similarity_index
 from poetry_app import db
 import os
 
@@ -14,6 +16,11 @@ poetry_service = PoetryService()
 def create():
     """创建新诗词"""
     if request.method == 'POST':
+        retry_after = check_rate_limit()
+        if retry_after:
+            flash(f'提交过于频繁，请 {retry_after} 秒后再试', 'error')
+            return render_template('poetry/create.html'), 429, {'Retry-After': str(retry_after)}
+        
         title = request.form.get('title', '').strip()
         content = request.form.get('content', '').strip()
         author = request.form.get('author', '匿名').strip()
@@ -51,7 +58,20 @@ def view(id):
         flash('诗词不存在', 'error')
         return redirect(url_for('main.index'))
     
-    return render_template('poetry/view.html', poetry=poetry)
+    return render_template('poetry/view.html', poetry=poetry, similar_poems=_similar_poems(poetry.id))
+
+def _similar_poems(poetry_id, k=4):
+    """获取详情页展示的相似诗词，索引不可用时返回空列表"""
+    index = get_similarity_index()
+    if not index.available:
+        return []
+    
+    try:
+        poem_ids = [poem_id for poem_id, _ in index.similar(poetry_id, k)]
+        return poetry_service.get_poem_rows_by_ids(poem_ids, ['id', 'title', 'author', 'image_path'])
+    except Exception as e:
+        current_app.logger.error(f"获取相似诗词失败: {e}")
+        return []
 
 @poetry_bp.route('/<int:id>/edit', methods=['GET', 'POST'])
 def edit(id):
@@ -62,6 +82,11 @@ def edit(id):
         return redirect(url_for('main.index'))
     
     if request.method == 'POST':
+        retry_after = check_rate_limit()
+        if retry_after:
+            flash(f'提交过于频繁，请 {retry_after} 秒后再试', 'error')
+            return render_template('poetry/edit.html', poetry=poetry), 429, {'Retry-After': str(retry_after)}
+        
         title = request.form.get('title', '').strip()
         content = request.form.get('content', '').strip()
         author = request.form.get('author', '匿名').strip()
@@ -135,6 +160,13 @@ def regenerate_image(id):
     if not poetry:
         return jsonify({'error': '诗词不存在'}), 404
     
+    retry_after = check_rate_limit()
+    if retry_after:
+        return jsonify({
+            'success': False,
+            'error': f'请求过于频繁，请 {retry_after} 秒后再试'
+        }), 429, {'Retry-After': str(retry_after)}
+    
     try:
         # 重新生成配图
         poetry_service._regenerate_image(poetry)
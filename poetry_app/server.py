@@ -0,0 +1,112 @@
+"""
+生产环境服务器（Gunicorn）
+
+在主进程中创建应用并完成初始化，冻结 GC 后再 fork worker，
+worker 以写时复制方式共享已加载的代码和数据；每个 worker 启动后丢弃
+继承自主进程的数据库连接，重新建立自己的连接池。
+
+    python main.py serve
+    flask --app main serve --workers 4
+
+平滑重启：kill -HUP $(cat <pidfile>)，主进程重新读取配置并逐个替换 worker，
+正在处理的请求会处理完成。应用已在主进程中预加载，代码更新需要完整重启。
+
+使用 gevent worker 时需要在导入应用之前打 monkey patch，只能通过设置
+SERVER_WORKER_CLASS=gevent 并运行 python main.py serve 启动（见 main.py）。
+"""
+
+import gc
+import importlib.util
+import multiprocessing
+from poetry_app import db
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:
+    # Windows 或未安装 gunicorn
+    BaseApplication = object
+
+
+def gunicorn_options(config, **overrides):
+    """
+    根据应用配置生成 Gunicorn 参数
+
+    Args:
+        config: 应用配置（app.config）
+        overrides: 命令行参数，值为None时使用配置
+
+    Returns:
+        dict: Gunicorn 配置项
+    """
+    workers = config.get('SERVER_WORKERS') or multiprocessing.cpu_count() * 2 + 1
+    options = {
+        'bind': config.get('SERVER_BIND', '0.0.0.0:8000'),
+        'workers': workers,
+        'worker_class': config.get('SERVER_WORKER_CLASS', 'gthread'),
+        'threads': config.get('SERVER_THREADS', 4),
+        'worker_connections': config.get('SERVER_WORKER_CONNECTIONS', 1000),
+        'max_requests': config.get('SERVER_MAX_REQUESTS', 1000),
+        'max_requests_jitter': config.get('SERVER_MAX_REQUESTS_JITTER', 100),
+        'timeout': config.get('SERVER_TIMEOUT', 120),
+        'graceful_timeout': config.get('SERVER_GRACEFUL_TIMEOUT', 30),
+        'keepalive': config.get('SERVER_KEEPALIVE', 5),
+        'pidfile': config.get('SERVER_PIDFILE'),
+        'accesslog': config.get('SERVER_ACCESS_LOG'),
+        'preload_app': True,
+    }
+    options.update({key: value for key, value in overrides.items() if value is not None})
+
+    if options['worker_class'] == 'gevent':
+        if importlib.util.find_spec('gevent') is None:
+            raise RuntimeError('worker_class 为 gevent 时需要安装 gevent')
+        # 预加载的应用已导入 ssl、httpx 等模块，worker 启动后再打补丁会出错
+        from gevent import monkey
+        if not monkey.is_module_patched('socket'):
+            raise RuntimeError('gevent worker 需要在导入应用之前打补丁，请设置 SERVER_WORKER_CLASS=gevent 后运行 python main.py serve')
+    return options
+
+
+def post_fork(server, worker):
+    """worker 启动后丢弃继承的数据库连接，避免多个进程共用同一个连接；
+    启动本进程的图片清理线程，处理之前遗留的待删除图片"""
+    app = server.app.application
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    app.extensions['image_sweeper'].start()
+
+
+class PoetryServer(BaseApplication):
+    """以已创建的 Flask 应用运行 Gunicorn"""
+
+    def __init__(self, application, options=None):
+        self.application = application
+        self.options = options or {}
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+        self.cfg.set('post_fork', post_fork)
+
+    def load(self):
+        # 主进程中的对象在 fork 前移出 GC 跟踪，
+        # 避免 worker 中的垃圾回收改写这些页面导致写时复制失效
+        gc.collect()
+        gc.freeze()
+        return self.application
+
+
+def run_server(app, **overrides):
+    """
+    使用 Gunicorn 启动应用（阻塞直到服务器退出）
+
+    Args:
+        app: Flask 应用（已完成数据库初始化）
+        overrides: 覆盖配置的 Gunicorn 参数，如 workers、bind
+    """
+    if BaseApplication is object:
+        raise RuntimeError('生产服务器需要 gunicorn（不支持 Windows），请运行 pip install gunicorn')
+
+    PoetryServer(app, gunicorn_options(app.config, **overrides)).run()
@@ -3,6 +3,9 @@
 """
 
 from .ai_service import AIImageService
+from .author_service import AuthorService
 from .poetry_service import PoetryService
+from .backfill_service import ImageBackfillService
+from .tag_service import TagService
 
-__all__ = ['AIImageService', 'PoetryService']
+__all__ = ['AIImageService', 'AuthorService', 'PoetryService', 'ImageBackfillService', 'TagService']
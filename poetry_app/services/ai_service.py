@@ -2,16 +2,20 @@
 AI图像生成服务
 """
 
+import hashlib
 import os
 import uuid
 import mimetypes
 import time
 import re
 import httpx
+from datetime import datetime
 from dotenv import load_dotenv
 from google import genai
 from google.genai import types
 from flask import current_app
+from poetry_app.services.generation_ledger import get_generation_ledger
+from poetry_app.utils.circuit_breaker import CircuitBreaker
 
 # 加载.env文件
 load_dotenv()
@@ -19,6 +23,8 @@ load_dotenv()
 class AIImageService:
     """AI图像生成服务类"""
     
+    MODEL = "gemini-2.5-flash-image-preview"
+    
     def __init__(self):
         self.api_key = os.environ.get("GEMINI_API_KEY")
         self.quota_exhausted = False
@@ -62,15 +68,39 @@ class AIImageService:
                 current_app.logger.warning("API配额已用完，请稍后再试或升级API计划")
                 return None
         
+        # Gemini 或代理不可用时快速失败，不再等待连接超时
+        breaker = get_gemini_breaker()
+        if not breaker.allow_request():
+            current_app.logger.warning("Gemini服务暂时不可用（熔断中），跳过图片生成")
+            return None
+        
+        prompt_hash = hashlib.sha256(self._build_prompt(poetry_content, poetry_title).encode('utf-8')).hexdigest()
+        waited_seconds = 0
         for attempt in range(max_retries):
+            started_at = datetime.utcnow()
+            started = time.perf_counter()
             try:
                 result = self._generate_image_attempt(poetry_content, poetry_title)
+                breaker.record_success()
+                self._record_attempt(prompt_hash, started_at, started, attempt, waited_seconds, result=result)
+                waited_seconds = 0
                 if result:
                     return result
                     
             except Exception as e:
                 error_msg = str(e)
                 current_app.logger.error(f"生成图片时出错 (尝试 {attempt + 1}/{max_retries}): {e}")
+                self._record_attempt(
+                    prompt_hash, started_at, started, attempt, waited_seconds,
+                    error=e, quota_limited=self._is_quota_exceeded(error_msg)
+                )
+                waited_seconds = 0
+                
+                # 配额和密钥错误说明服务可达，不计入熔断
+                if self._is_quota_exceeded(error_msg) or "API_KEY" in error_msg:
+                    breaker.record_success()
+                else:
+                    breaker.record_failure(e)
                 
                 # 检查是否是配额限制错误
                 if self._is_quota_exceeded(error_msg):
@@ -78,6 +108,7 @@ class AIImageService:
                         retry_delay = self._get_retry_delay(error_msg)
                         current_app.logger.warning(f"配额限制，等待 {retry_delay} 秒后重试...")
                         time.sleep(retry_delay)
+                        waited_seconds = retry_delay
                         continue
                     else:
                         current_app.logger.error("配额限制，已达到最大重试次数")
@@ -100,7 +131,7 @@ class AIImageService:
             # 构建图片生成提示词
             prompt = self._build_prompt(poetry_content, poetry_title)
             
-            model = "gemini-2.5-flash-image-preview"
+            model = self.MODEL
             contents = [
                 types.Content(
                     role="user",
@@ -147,6 +178,39 @@ class AIImageService:
             # 重新抛出异常，让上层处理重试逻辑
             raise e
     
+    def _record_attempt(self, prompt_hash, started_at, started, retry_count, waited_seconds,
+                        result=None, error=None, quota_limited=False):
+        """写入调用记录（异步批量写入，失败不影响图片生成）"""
+        try:
+            bytes_received = 0
+            if result:
+                file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], result)
+                if os.path.exists(file_path):
+                    bytes_received = os.path.getsize(file_path)
+            
+            if error is not None:
+                error_class = type(error).__name__
+            elif not result:
+                error_class = 'NoImageData'
+            else:
+                error_class = None
+            
+            get_generation_ledger().record(
+                prompt_hash=prompt_hash,
+                model=self.MODEL,
+                started_at=started_at,
+                finished_at=datetime.utcnow(),
+                duration_ms=round((time.perf_counter() - started) * 1000, 1),
+                bytes_received=bytes_received,
+                retry_count=retry_count,
+                success=bool(result),
+                error_class=error_class,
+                quota_limited=quota_limited,
+                waited_seconds=waited_seconds,
+            )
+        except Exception as e:
+            current_app.logger.error(f"记录图片生成调用失败: {e}")
+    
     def _build_prompt(self, poetry_content, poetry_title=None):
         """构建图片生成提示词"""
         title_part = f"《{poetry_title}》" if poetry_title else "这首诗词"
@@ -233,3 +297,16 @@ class AIImageService:
         """获取当前代理配置信息"""
         proxy_url = os.environ.get('HTTP_PROXY') or os.environ.get('HTTPS_PROXY') or os.environ.get('ALL_PROXY')
         return proxy_url
+
+
+def init_gemini_breaker(app):
+    """为应用创建 Gemini 调用熔断器（进程内所有 AIImageService 共享）"""
+    app.extensions['gemini_breaker'] = CircuitBreaker(
+        'gemini',
+        failure_threshold=app.config.get('GEMINI_BREAKER_FAILURE_THRESHOLD', 5),
+        recovery_timeout=app.config.get('GEMINI_BREAKER_RECOVERY_TIMEOUT', 60),
+    )
+
+def get_gemini_breaker():
+    """获取当前应用的 Gemini 熔断器"""
+    return current_app.extensions['gemini_breaker']
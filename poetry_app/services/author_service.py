@@ -0,0 +1,141 @@
+"""
+作者服务
+"""
+
+from datetime import datetime
+from sqlalchemy import event, func, inspect, select, update
+from poetry_app import db
+from poetry_app.models.author import Author
+from poetry_app.models.poetry import Poetry
+from poetry_app.utils.database import RoutingSession, insert_ignore
+
+class AuthorService:
+    """作者服务类
+
+    诗词的 author_id 和作者的 poem_count 在会话 flush 时自动维护（见下方事件），
+    作者列表、作者统计和按作者浏览都通过作者表和索引查询，不扫描诗词表。
+    """
+
+    @staticmethod
+    def get_authors_page(page=1, per_page=20):
+        """
+        分页获取作者列表，按诗词数量降序
+
+        Returns:
+            list: [{'id': 作者ID, 'name': 作者名, 'poem_count': 诗词数量}]
+        """
+        stmt = (
+            select(Author.id, Author.name, Author.poem_count)
+            .where(Author.poem_count > 0)
+            .order_by(Author.poem_count.desc(), Author.id)
+            .limit(per_page)
+            .offset((page - 1) * per_page)
+        )
+        return [dict(row._mapping) for row in db.session.execute(stmt)]
+
+    @staticmethod
+    def count_authors():
+        """统计有诗词的作者数量"""
+        return db.session.execute(
+            select(func.count()).select_from(Author).where(Author.poem_count > 0)
+        ).scalar()
+
+    @staticmethod
+    def get_author(author_id):
+        """根据ID获取作者（字典），不存在时返回None"""
+        row = db.session.execute(
+            select(Author.id, Author.name, Author.poem_count).where(Author.id == author_id)
+        ).first()
+        return dict(row._mapping) if row else None
+
+    @staticmethod
+    def poems_condition(author_id):
+        """该作者的诗词条件（按 author_id 索引查找）"""
+        return Poetry.author_id == author_id
+
+    def backfill(self, batch_size=1000):
+        """
+        根据诗词的 author 列补全作者表和 author_id，并重新计算各作者的诗词数量
+
+        可重复执行；用于从旧版本升级以及修正被批量SQL绕过的计数。
+
+        Returns:
+            int: 关联到作者的诗词数量
+        """
+        total = 0
+        while True:
+            rows = db.session.execute(
+                select(Poetry.id, Poetry.author)
+                .where(Poetry.author_id.is_(None), Poetry.author.isnot(None), Poetry.author != '')
+                .order_by(Poetry.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            author_ids = _get_or_create_author_ids(db.session, {author for _, author in rows})
+            # 显式更新 updated_at（不依赖批量UPDATE是否执行 onupdate），使诗词的 ETag 随 author_id 改变
+            now = datetime.utcnow()
+            db.session.execute(
+                update(Poetry),
+                [{'id': poem_id, 'author_id': author_ids[author], 'updated_at': now} for poem_id, author in rows],
+            )
+            db.session.commit()
+            total += len(rows)
+
+        counts = (
+            select(func.count(Poetry.id))
+            .where(Poetry.author_id == Author.id)
+            .scalar_subquery()
+        )
+        db.session.execute(update(Author.__table__).values(poem_count=counts))
+        db.session.commit()
+        return total
+
+
+def _get_or_create_author_ids(session, names):
+    """批量获取作者ID，不存在的先插入（并发插入同名作者时忽略冲突）"""
+    if not names:
+        return {}
+
+    session.execute(insert_ignore(session, Author, [{'name': name} for name in names]))
+    return dict(session.execute(select(Author.name, Author.id).where(Author.name.in_(names))).all())
+
+def _author_changed(poetry):
+    return inspect(poetry).attrs.author.history.has_changes()
+
+@event.listens_for(RoutingSession, 'before_flush')
+def _sync_authors(session, flush_context, instances):
+    """根据作者名设置 author_id，并按增减调整作者的诗词数量"""
+    deltas = {}
+    pending = []
+
+    for obj in session.new:
+        if isinstance(obj, Poetry):
+            if obj.author is None:
+                obj.author = Poetry.__table__.c.author.default.arg
+            pending.append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, Poetry) and _author_changed(obj):
+            if obj.author_id is not None:
+                deltas[obj.author_id] = deltas.get(obj.author_id, 0) - 1
+            pending.append(obj)
+    for obj in session.deleted:
+        if isinstance(obj, Poetry) and obj.author_id is not None:
+            deltas[obj.author_id] = deltas.get(obj.author_id, 0) - 1
+
+    if pending:
+        author_ids = _get_or_create_author_ids(session, {obj.author for obj in pending if obj.author})
+        for obj in pending:
+            obj.author_id = author_ids.get(obj.author)
+            if obj.author_id is not None:
+                deltas[obj.author_id] = deltas.get(obj.author_id, 0) + 1
+
+    authors = Author.__table__
+    for author_id, delta in deltas.items():
+        if delta:
+            session.execute(
+                update(authors)
+                .where(authors.c.id == author_id)
+                .values(poem_count=authors.c.poem_count + delta)
+            )
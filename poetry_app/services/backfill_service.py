@@ -0,0 +1,276 @@
+"""
+配图批量补全服务
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from poetry_app import db
+from poetry_app.models.poetry import Poetry
+from poetry_app.services.ai_service import AIImageService
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+class ImageBackfillService:
+    """为缺少配图（或图片文件丢失）的诗词批量生成配图
+
+    按ID升序分批处理，每批完成后提交数据库并写入检查点，
+    中断或配额预算用完后再次运行会从上次完成的位置继续。
+
+    运行期间持有检查点旁的文件锁（POSIX），多个 worker 进程同时只有一个任务；
+    进度随检查点一起写入文件，任意进程都可以查询。
+    """
+
+    def __init__(self, ai_service=None):
+        self.ai_service = ai_service or AIImageService()
+        self._progress = {'status': 'idle'}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    @property
+    def progress(self):
+        """当前进度：本进程正在运行时取内存中的进度，否则读取检查点文件"""
+        if self._lock.locked():
+            return dict(self._progress)
+
+        progress = self._load_checkpoint(self._checkpoint_path()).get('progress')
+        if not progress:
+            return dict(self._progress)
+        if progress.get('status') == 'running' and not self._locked_elsewhere():
+            # 运行任务的进程已退出，下次运行从检查点继续
+            progress['status'] = 'interrupted'
+        return progress
+
+    @property
+    def is_running(self):
+        """是否有补全任务正在运行（包括其他进程）"""
+        return self._lock.locked() or self._locked_elsewhere()
+
+    def stop(self):
+        """请求停止当前任务（当前批次完成后生效，可由任意进程发出）"""
+        self._stop_event.set()
+        path = f"{self._checkpoint_path()}.stop"
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w'):
+            pass
+
+    def find_candidates(self, after_id=0):
+        """
+        查找需要补全配图的诗词ID
+
+        Args:
+            after_id (int): 只返回ID大于该值的诗词
+
+        Returns:
+            list: 按升序排列的诗词ID列表
+        """
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+        rows = db.session.query(Poetry.id, Poetry.image_path).filter(
+            Poetry.id > after_id
+        ).order_by(Poetry.id).yield_per(1000)
+
+        candidates = []
+        for poetry_id, image_path in rows:
+            if not image_path or not os.path.exists(os.path.join(upload_folder, image_path)):
+                candidates.append(poetry_id)
+        return candidates
+
+    def run(self, concurrency=None, budget=None, reset=False, progress_callback=None):
+        """
+        执行批量补全，需要在应用上下文中调用
+
+        Args:
+            concurrency (int): 并发生成数量，默认读取 BACKFILL_CONCURRENCY
+            budget (int): 本次最多调用图片生成的次数，默认读取 BACKFILL_QUOTA_BUDGET
+            reset (bool): 是否忽略检查点从头开始
+            progress_callback (callable): 每批完成后以进度字典为参数回调
+
+        Returns:
+            dict: 最终进度信息
+        """
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError('已有补全任务正在运行')
+
+        checkpoint_path = self._checkpoint_path()
+        lock_file = None
+        try:
+            lock_file = self._acquire_file_lock(checkpoint_path)
+            return self._run(checkpoint_path, concurrency, budget, reset, progress_callback)
+        except Exception:
+            if lock_file is not None and self._progress.get('status') == 'running':
+                self._progress['status'] = 'failed'
+                self._save_checkpoint(checkpoint_path, self._progress.get('last_id', 0), self._progress)
+            raise
+        finally:
+            if lock_file is not None:
+                lock_file.close()
+            self._lock.release()
+
+    @staticmethod
+    def _acquire_file_lock(checkpoint_path):
+        """获取跨进程文件锁，其他进程正在运行时抛出 RuntimeError"""
+        os.makedirs(os.path.dirname(os.path.abspath(checkpoint_path)), exist_ok=True)
+        lock_file = open(f"{checkpoint_path}.lock", 'w')
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                raise RuntimeError('已有补全任务正在运行')
+        return lock_file
+
+    def _locked_elsewhere(self):
+        """其他进程是否持有补全任务的文件锁"""
+        if fcntl is None:
+            return False
+        lock_path = f"{self._checkpoint_path()}.lock"
+        if not os.path.exists(lock_path):
+            return False
+        with open(lock_path, 'w') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            return False
+
+    def _run(self, checkpoint_path, concurrency, budget, reset, progress_callback):
+        config = current_app.config
+        concurrency = max(1, concurrency or config.get('BACKFILL_CONCURRENCY', 2))
+        concurrency = min(concurrency, config.get('BACKFILL_MAX_CONCURRENCY', 8))
+        if budget is None:
+            budget = config.get('BACKFILL_QUOTA_BUDGET')
+
+        if reset and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        checkpoint = self._load_checkpoint(checkpoint_path)
+        stop_path = f"{checkpoint_path}.stop"
+        if os.path.exists(stop_path):
+            os.remove(stop_path)
+
+        candidates = self.find_candidates(checkpoint.get('last_id', 0))
+        if budget is not None:
+            total = min(len(candidates), budget)
+        else:
+            total = len(candidates)
+
+        self._stop_event.clear()
+        started = time.time()
+        self._progress = {
+            'status': 'running',
+            'total': total,
+            'processed': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'last_id': checkpoint.get('last_id', 0),
+            'started_at': started,
+            'elapsed_seconds': 0,
+            'throughput_per_minute': 0,
+            'eta_seconds': None,
+        }
+        self._save_checkpoint(checkpoint_path, self._progress['last_id'], self._progress)
+
+        app = current_app._get_current_object()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for start in range(0, total, concurrency):
+                if self._stop_event.is_set() or os.path.exists(stop_path):
+                    self._progress['status'] = 'stopped'
+                    break
+
+                batch_ids = candidates[start:min(start + concurrency, total)]
+                poems = Poetry.query.filter(Poetry.id.in_(batch_ids)).all()
+                futures = {
+                    poem.id: executor.submit(self._generate, app, poem.content, poem.title)
+                    for poem in poems
+                }
+
+                for poem in poems:
+                    image_filename = futures[poem.id].result()
+                    if image_filename:
+                        poem.image_path = image_filename
+                        poem.image_prompt = f"根据诗词《{poem.title}》补全生成"
+                        self._progress['succeeded'] += 1
+                    else:
+                        self._progress['failed'] += 1
+
+                try:
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    raise
+
+                self._progress['processed'] += len(batch_ids)
+                self._progress['last_id'] = batch_ids[-1]
+                self._update_rates(started)
+                self._save_checkpoint(checkpoint_path, batch_ids[-1], self._progress)
+
+                if progress_callback:
+                    progress_callback(dict(self._progress))
+            else:
+                if total < len(candidates):
+                    # 配额预算用完，保留检查点供下次继续
+                    self._progress['status'] = 'budget_exhausted'
+                else:
+                    # 全部处理完毕，清除继续位置，下次运行重新扫描（包括本次失败的诗词）
+                    self._progress['status'] = 'finished'
+
+        self._update_rates(started)
+        last_id = 0 if self._progress['status'] == 'finished' else self._progress['last_id']
+        self._save_checkpoint(checkpoint_path, last_id, self._progress)
+        current_app.logger.info(
+            f"配图补全结束: 成功 {self._progress['succeeded']}，失败 {self._progress['failed']}，"
+            f"状态 {self._progress['status']}"
+        )
+        return dict(self._progress)
+
+    def _generate(self, app, content, title):
+        """在工作线程中生成单张配图"""
+        with app.app_context():
+            try:
+                # 批量任务按调用次数计算配额，不在单首诗上反复重试
+                return self.ai_service.generate_image_from_poetry(content, title, max_retries=1)
+            except Exception as e:
+                current_app.logger.error(f"补全配图失败: {e}")
+                return None
+
+    def _update_rates(self, started):
+        """更新吞吐量和预计剩余时间"""
+        elapsed = time.time() - started
+        processed = self._progress['processed']
+        remaining = self._progress['total'] - processed
+
+        self._progress['elapsed_seconds'] = round(elapsed, 2)
+        if processed and elapsed > 0:
+            self._progress['throughput_per_minute'] = round(processed / elapsed * 60, 2)
+            self._progress['eta_seconds'] = round(remaining * elapsed / processed, 1)
+
+    @staticmethod
+    def _checkpoint_path():
+        """检查点文件路径"""
+        return current_app.config.get('BACKFILL_CHECKPOINT_PATH') or os.path.join(
+            current_app.instance_path, 'backfill_checkpoint.json'
+        )
+
+    @staticmethod
+    def _load_checkpoint(path):
+        """读取检查点，文件不存在或损坏时从头开始"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _save_checkpoint(path, last_id, progress):
+        """原子写入检查点（继续位置和进度）"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'last_id': last_id, 'updated_at': time.time(), 'progress': progress}, f)
+        os.replace(tmp_path, path)
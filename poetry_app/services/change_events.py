@@ -0,0 +1,56 @@
+"""
+诗词变更事件
+
+在会话 flush 时收集新增、修改和删除的诗词ID，提交成功后通知监听者，
+供相似度索引等进程内索引增量更新。回滚时丢弃收集到的变更。
+"""
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from poetry_app.models.poetry import Poetry
+from poetry_app.utils.database import RoutingSession
+
+_listeners = []
+
+def on_poetry_change(listener):
+    """
+    注册变更监听函数（可用作装饰器）
+
+    监听函数在提交成功后、应用上下文中调用，参数为
+    {'upserted': set(诗词ID), 'deleted': set(诗词ID)}。
+    此时原会话已不能执行SQL，需要读取数据时应使用独立连接。
+    """
+    _listeners.append(listener)
+    return listener
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _collect_changes(session, flush_context):
+    changes = session.info.setdefault('poetry_changes', {'upserted': set(), 'deleted': set()})
+    for obj in session.new:
+        if isinstance(obj, Poetry):
+            changes['upserted'].add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, Poetry) and session.is_modified(obj):
+            changes['upserted'].add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Poetry):
+            changes['upserted'].discard(obj.id)
+            changes['deleted'].add(obj.id)
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _dispatch_changes(session):
+    changes = session.info.pop('poetry_changes', None)
+    if not changes or not has_app_context():
+        return
+    if not (changes['upserted'] or changes['deleted']):
+        return
+
+    for listener in _listeners:
+        try:
+            listener(changes)
+        except Exception as e:
+            current_app.logger.error(f"处理诗词变更失败 ({listener.__name__}): {e}")
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('poetry_changes', None)
@@ -0,0 +1,231 @@
+"""
+图片生成调用记录服务
+"""
+
+import atexit
+import math
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import insert, select
+from poetry_app import db
+from poetry_app.models.generation_attempt import GenerationAttempt
+
+class GenerationLedger:
+    """图片生成调用记录
+
+    record() 只把记录放入内存队列，后台线程按批写入数据库（每 batch_size 条或
+    每 flush_interval 秒一次），不占用请求的时间。队列满时丢弃新记录并计数。
+    线程按进程ID启动，fork 出的 worker 进程首次记录时会启动自己的线程；
+    进程正常退出时写入剩余记录。
+    """
+
+    def __init__(self, app, batch_size=100, flush_interval=2.0, max_queue=10000, async_writes=True):
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.async_writes = async_writes
+        self.dropped = 0
+        self.max_queue = max_queue
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def record(self, **attempt):
+        """记录一次调用，字段与 GenerationAttempt 的列相同"""
+        self._reset_after_fork()
+        try:
+            self._queue.put_nowait(attempt)
+        except queue.Full:
+            self.dropped += 1
+            return
+
+        if self.async_writes:
+            self._ensure_started()
+        else:
+            self.flush()
+
+    def _reset_after_fork(self):
+        """fork 出的子进程不继承父进程的写入线程，也不负责父进程队列中的记录"""
+        with self._lock:
+            if self._pid is not None and self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self.max_queue)
+                self._thread = None
+                self._pid = os.getpid()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            first_start = self._pid is None
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='generation-ledger', daemon=True)
+            self._thread.start()
+            if first_start:
+                atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            # 从第一条记录起最多等待 flush_interval 秒，记录持续少量到达时也按时写入
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def flush(self, timeout=10.0):
+        """
+        立即写入队列中的全部记录，并等待后台线程正在写入的批次完成
+
+        Args:
+            timeout (float): 等待后台批次的最长秒数
+
+        Returns:
+            bool: 全部记录都已写入返回True，等待超时返回False
+        """
+        self._reset_after_fork()
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                break
+            self._write(batch)
+
+        # Queue.join() 不支持超时，直接等待其内部的条件变量
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def _write(self, batch):
+        # 使用独立连接，不影响请求中的会话和事务
+        with self._write_lock, self.app.app_context():
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(insert(GenerationAttempt), batch)
+            except Exception as e:
+                self.app.logger.error(f"写入图片生成记录失败（{len(batch)} 条）: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    @staticmethod
+    def summarize(hours=24, bucket_minutes=60):
+        """
+        统计最近一段时间的调用情况
+
+        Args:
+            hours (int): 统计窗口（小时）
+            bucket_minutes (int): 时间分桶（分钟）
+
+        Returns:
+            dict: 整个窗口的汇总（summary）和按时间分桶的统计（buckets）
+        """
+        now = datetime.utcnow()
+        since = now - timedelta(hours=hours)
+        rows = db.session.execute(
+            select(
+                GenerationAttempt.started_at,
+                GenerationAttempt.duration_ms,
+                GenerationAttempt.success,
+                GenerationAttempt.retry_count,
+                GenerationAttempt.error_class,
+                GenerationAttempt.quota_limited,
+                GenerationAttempt.waited_seconds,
+                GenerationAttempt.bytes_received,
+            )
+            .where(GenerationAttempt.started_at >= since)
+            .order_by(GenerationAttempt.started_at)
+        ).all()
+
+        bucket_size = timedelta(minutes=bucket_minutes)
+        buckets = {}
+        for row in rows:
+            index = int((row.started_at - since) / bucket_size)
+            buckets.setdefault(index, []).append(row)
+
+        return {
+            'window_hours': hours,
+            'bucket_minutes': bucket_minutes,
+            'since': since,
+            'summary': _summarize_rows(rows, detailed=True),
+            'buckets': [
+                dict(start=since + bucket_size * index, **_summarize_rows(bucket_rows))
+                for index, bucket_rows in sorted(buckets.items())
+            ],
+        }
+
+
+def _percentile(sorted_values, percent):
+    """最近秩法百分位数"""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(percent / 100 * len(sorted_values)), 1)
+    return round(sorted_values[rank - 1], 1)
+
+def _summarize_rows(rows, detailed=False):
+    attempts = len(rows)
+    successes = sum(1 for row in rows if row.success)
+    durations = sorted(row.duration_ms for row in rows)
+    summary = {
+        'attempts': attempts,
+        'successes': successes,
+        'success_rate': round(successes / attempts, 4) if attempts else None,
+        'retry_rate': round(sum(1 for row in rows if row.retry_count > 0) / attempts, 4) if attempts else None,
+        'latency_ms': {
+            'p50': _percentile(durations, 50),
+            'p90': _percentile(durations, 90),
+            'p95': _percentile(durations, 95),
+            'p99': _percentile(durations, 99),
+        },
+    }
+    if detailed:
+        errors = {}
+        for row in rows:
+            if row.error_class:
+                errors[row.error_class] = errors.get(row.error_class, 0) + 1
+        summary.update({
+            'quota_limited': sum(1 for row in rows if row.quota_limited),
+            'waited_seconds': round(sum(row.waited_seconds for row in rows), 1),
+            'bytes_received': sum(row.bytes_received for row in rows),
+            'errors': errors,
+        })
+    return summary
+
+
+def init_generation_ledger(app):
+    """为应用创建图片生成调用记录（写入线程在首次记录时启动）"""
+    app.extensions['generation_ledger'] = GenerationLedger(
+        app,
+        batch_size=app.config.get('GENERATION_LEDGER_BATCH_SIZE', 100),
+        flush_interval=app.config.get('GENERATION_LEDGER_FLUSH_INTERVAL', 2.0),
+        max_queue=app.config.get('GENERATION_LEDGER_MAX_QUEUE', 10000),
+        async_writes=app.config.get('GENERATION_LEDGER_ASYNC', True),
+    )
+
+def get_generation_ledger():
+    """获取当前应用的图片生成调用记录"""
+    return current_app.extensions['generation_ledger']
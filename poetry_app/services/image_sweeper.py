@@ -0,0 +1,137 @@
+"""
+图片文件清理服务
+"""
+
+import os
+import threading
+from flask import current_app, has_app_context
+from sqlalchemy import delete, event, select
+from poetry_app import db
+from poetry_app.models.image_tombstone import ImageTombstone
+from poetry_app.models.poetry import Poetry
+from poetry_app.utils.database import RoutingSession
+
+class ImageSweeper:
+    """后台删除 ImageTombstone 记录的图片文件
+
+    写入待删除记录的事务提交后唤醒后台线程，另外每隔 interval 秒检查一次，
+    处理之前进程退出时遗留的记录。线程按进程ID启动：worker 进程启动时调用
+    start()（立即清理一次遗留记录），fork 出的进程首次唤醒时也会启动自己的线程。
+    """
+
+    def __init__(self, app, interval=60, batch_size=500, enabled=True):
+        self.app = app
+        self.interval = interval
+        self.batch_size = batch_size
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._wake_event = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def start(self):
+        """在当前进程启动清理线程并立即处理遗留记录（进程或 worker 启动时调用）"""
+        self.wake()
+
+    def wake(self):
+        """唤醒清理线程（未启动或在 fork 后的新进程中时先启动）"""
+        if not self.enabled:
+            return
+        self._ensure_started()
+        self._wake_event.set()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            wake_event = threading.Event()
+            self._wake_event = wake_event
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, args=(wake_event,), name='image-sweeper', daemon=True)
+            self._thread.start()
+
+    def _run(self, wake_event):
+        while True:
+            wake_event.wait(self.interval)
+            wake_event.clear()
+            with self.app.app_context():
+                try:
+                    while self.sweep() == self.batch_size:
+                        pass
+                except Exception as e:
+                    self.app.logger.error(f"清理图片文件失败: {e}")
+                finally:
+                    db.session.remove()
+
+    def sweep(self):
+        """
+        处理一批待删除记录：删除文件后移除记录
+
+        仍被诗词引用的图片只移除记录，不删除文件。
+
+        Returns:
+            int: 本批移除的记录数（删除失败的记录保留，下次重试）
+        """
+        tombstones = db.session.execute(
+            select(ImageTombstone.id, ImageTombstone.image_path)
+            .order_by(ImageTombstone.id)
+            .limit(self.batch_size)
+        ).all()
+        if not tombstones:
+            return 0
+
+        paths = {image_path for _, image_path in tombstones}
+        in_use = set(db.session.execute(
+            select(Poetry.image_path).where(Poetry.image_path.in_(paths))
+        ).scalars())
+
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+        done = []
+        for tombstone_id, image_path in tombstones:
+            if image_path not in in_use:
+                try:
+                    os.remove(os.path.join(upload_folder, image_path))
+                    current_app.logger.info(f"已删除图片文件: {image_path}")
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    # 保留记录，下次重试
+                    current_app.logger.error(f"删除图片文件失败 ({image_path}): {e}")
+                    continue
+            done.append(tombstone_id)
+
+        if done:
+            db.session.execute(delete(ImageTombstone).where(ImageTombstone.id.in_(done)))
+        db.session.commit()
+        return len(done)
+
+
+def init_image_sweeper(app):
+    """为应用创建图片清理器（线程在 start() 或首次唤醒时启动）"""
+    app.extensions['image_sweeper'] = ImageSweeper(
+        app,
+        interval=app.config.get('IMAGE_SWEEP_INTERVAL', 60),
+        batch_size=app.config.get('IMAGE_SWEEP_BATCH_SIZE', 500),
+        enabled=app.config.get('IMAGE_SWEEPER_ENABLED', True),
+    )
+
+def get_image_sweeper():
+    """获取当前应用的图片清理器"""
+    return current_app.extensions['image_sweeper']
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _collect_tombstones(session, flush_context):
+    if any(isinstance(obj, ImageTombstone) for obj in session.new):
+        session.info['image_tombstones'] = True
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _wake_sweeper(session):
+    if not session.info.pop('image_tombstones', False) or not has_app_context():
+        return
+    sweeper = current_app.extensions.get('image_sweeper')
+    if sweeper is not None:
+        sweeper.wake()
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard_tombstones(session):
+    session.info.pop('image_tombstones', None)
@@ -2,16 +2,30 @@
 诗词业务逻辑服务
 """
 
-import os
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import load_only, selectinload, with_expression
+from poetry_app import db
+from poetry_app.models.image_tombstone import ImageTombstone
 from poetry_app.models.poetry import Poetry
 from poetry_app.services.ai_service import AIImageService
+from poetry_app.services.tag_service import TagService
 from flask import current_app
 
 class PoetryService:
     """诗词服务类"""
     
+    # 列表预览截取的字符数
+    PREVIEW_LENGTH = 100
+    
+    # 列表页需要的字段（其余大字段不加载）
+    LIST_FIELDS = ('id', 'title', 'author', 'created_at', 'image_path')
+    
+    # 批量更新允许修改的字段
+    BULK_UPDATE_FIELDS = ('title', 'content', 'author')
+    
     def __init__(self):
         self.ai_service = AIImageService()
+        self.tag_service = TagService()
     
     def create_poetry(self, title, content, author='匿名'):
         """
@@ -37,6 +51,9 @@ class PoetryService:
         except Exception as e:
             current_app.logger.error(f"生成配图失败: {e}")
         
+        # 标签写入会开启数据库写事务，放在配图生成之后，避免调用AI接口期间占用写锁
+        self.tag_service.assign_tags(poetry)
+        
         return poetry
     
     def update_poetry(self, poetry, title, content, author):
@@ -61,6 +78,9 @@ class PoetryService:
             # 重新生成配图
             self._regenerate_image(poetry)
             
+            # 配图生成之后再写入标签（见 create_poetry）
+            self.tag_service.assign_tags(poetry)
+            
             return True
         except Exception as e:
             current_app.logger.error(f"更新诗词失败: {e}")
@@ -77,9 +97,8 @@ class PoetryService:
             bool: 是否成功删除
         """
         try:
-            # 删除图片文件
-            if poetry.image_path:
-                self._delete_image_file(poetry.image_path)
+            # 图片文件在事务提交后由 ImageSweeper 删除
+            self._discard_image(poetry.image_path)
             
             return True
         except Exception as e:
@@ -87,45 +106,260 @@ class PoetryService:
             return False
     
     def _regenerate_image(self, poetry):
-        """重新生成配图"""
+        """重新生成配图，生成成功后才丢弃旧图片"""
         try:
-            # 删除旧图片
-            if poetry.image_path:
-                self._delete_image_file(poetry.image_path)
-            
             # 生成新图片
             image_filename = self.ai_service.generate_image_from_poetry(
                 poetry.content, poetry.title
             )
             if image_filename:
+                self._discard_image(poetry.image_path)
                 poetry.image_path = image_filename
                 poetry.image_prompt = f"根据诗词《{poetry.title}》重新生成"
         except Exception as e:
             current_app.logger.error(f"重新生成配图失败: {e}")
     
-    def _delete_image_file(self, image_path):
-        """删除图片文件"""
+    @staticmethod
+    def _discard_image(image_path):
+        """登记待删除的图片，与当前事务一起提交（见 ImageSweeper）"""
         if image_path:
-            file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], image_path)
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                current_app.logger.info(f"已删除图片文件: {image_path}")
+            db.session.add(ImageTombstone(image_path=image_path))
+    
+    def delete_poems(self, poetry_ids, batch_size=500):
+        """
+        批量删除诗词（不提交，由调用方在同一事务中提交）
+        
+        Args:
+            poetry_ids (list): 诗词ID列表
+            batch_size (int): 每次查询的ID数量
+            
+        Returns:
+            list: 实际删除的诗词ID
+        """
+        deleted = []
+        poetry_ids = list(dict.fromkeys(poetry_ids))
+        for start in range(0, len(poetry_ids), batch_size):
+            chunk = poetry_ids[start:start + batch_size]
+            poems = Poetry.query.options(selectinload(Poetry.tags)).filter(Poetry.id.in_(chunk)).all()
+            for poetry in poems:
+                self._discard_image(poetry.image_path)
+                db.session.delete(poetry)
+                deleted.append(poetry.id)
+        return deleted
+    
+    def update_poems(self, updates, batch_size=500):
+        """
+        批量更新诗词的标题、内容或作者（不提交，不重新生成配图）
+        
+        Args:
+            updates (list): [{'id': 诗词ID, 'title'/'content'/'author': 新值}]
+            batch_size (int): 每次查询的ID数量
+            
+        Returns:
+            list: 不存在的诗词ID
+            
+        Raises:
+            ValueError: 包含不支持的字段或空的标题、内容
+        """
+        changes = {}
+        for item in updates:
+            if not isinstance(item, dict) or type(item.get('id')) is not int:
+                raise ValueError('每一项都需要整数 id')
+            unknown = set(item) - {'id'} - set(self.BULK_UPDATE_FIELDS)
+            if unknown:
+                raise ValueError(f"不支持的字段: {', '.join(sorted(unknown))}")
+            values = {}
+            for field in self.BULK_UPDATE_FIELDS:
+                if field in item:
+                    value = str(item[field] or '').strip()
+                    if not value and field != 'author':
+                        raise ValueError(f"诗词 {item['id']} 的 {field} 不能为空")
+                    values[field] = value or '匿名'
+            changes.setdefault(item['id'], {}).update(values)
+        
+        found = set()
+        poetry_ids = list(changes)
+        for start in range(0, len(poetry_ids), batch_size):
+            chunk = poetry_ids[start:start + batch_size]
+            for poetry in Poetry.query.filter(Poetry.id.in_(chunk)).all():
+                found.add(poetry.id)
+                values = changes[poetry.id]
+                for field, value in values.items():
+                    setattr(poetry, field, value)
+                if 'title' in values or 'content' in values:
+                    self.tag_service.assign_tags(poetry)
+        
+        return [poetry_id for poetry_id in poetry_ids if poetry_id not in found]
     
     @staticmethod
     def get_poetry_by_id(poetry_id):
         """根据ID获取诗词"""
         return Poetry.query.get(poetry_id)
     
-    @staticmethod
-    def get_all_poems():
-        """获取所有诗词"""
-        return Poetry.query.order_by(Poetry.created_at.desc()).all()
+    @classmethod
+    def iter_poems(cls, keyword=None, list_view=False, batch_size=100):
+        """
+        逐批读取诗词（按创建时间降序），用于流式输出的列表页
+        
+        Args:
+            keyword (str): 搜索关键词，为空时返回全部诗词
+            list_view (bool): 只加载列表字段和SQL计算的内容预览
+            batch_size (int): 每批从数据库读取的行数
+            
+        Returns:
+            iterator: 诗词对象迭代器，不会一次性把全部结果加载到内存
+        """
+        query = cls._poems_query(list_view)
+        if keyword:
+            query = query.filter(cls._search_condition(keyword))
+        return query.order_by(Poetry.created_at.desc()).yield_per(batch_size)
+    
+    @classmethod
+    def _poems_query(cls, list_view=False):
+        """诗词查询，列表视图下延迟加载 content、image_prompt 等大字段"""
+        query = Poetry.query
+        if list_view:
+            query = query.options(
+                load_only(*[getattr(Poetry, field) for field in cls.LIST_FIELDS]),
+                with_expression(Poetry.preview, cls._preview_expression()),
+            )
+        return query
+    
+    @classmethod
+    def _preview_expression(cls):
+        """在SQL中截取内容预览，超出长度时追加省略号"""
+        return case(
+            (func.length(Poetry.content) > cls.PREVIEW_LENGTH,
+             func.substr(Poetry.content, 1, cls.PREVIEW_LENGTH) + '...'),
+            else_=Poetry.content,
+        )
     
     @staticmethod
-    def search_poems(keyword):
-        """搜索诗词"""
-        return Poetry.query.filter(
+    def _search_condition(keyword):
+        """搜索条件：标题、内容或作者包含关键词"""
+        return (
             Poetry.title.contains(keyword) | 
             Poetry.content.contains(keyword) |
             Poetry.author.contains(keyword)
-        ).order_by(Poetry.created_at.desc()).all()
+        )
+    
+    # 以下方法供JSON接口使用：只查询列元组并直接转换为字典，
+    # 跳过ORM对象构造，日期时间由JSON序列化器处理
+    
+    @staticmethod
+    def _fetch_rows(stmt):
+        """执行列查询，返回字典列表"""
+        result = db.session.execute(stmt)
+        keys = list(result.keys())
+        return [dict(zip(keys, row)) for row in result]
+    
+    @staticmethod
+    def parse_fields(raw):
+        """
+        解析接口的 fields 参数
+        
+        Args:
+            raw (str): 逗号分隔的字段名，可用字段为 to_dict() 的字段和 preview
+            
+        Returns:
+            list: 字段列表，未指定时返回None（全部字段）
+            
+        Raises:
+            ValueError: 包含不支持的字段
+        """
+        if not raw:
+            return None
+        
+        fields = list(dict.fromkeys(field.strip() for field in raw.split(',') if field.strip()))
+        unknown = [field for field in fields if field not in Poetry.DICT_FIELDS + ('preview',)]
+        if unknown:
+            raise ValueError(f"不支持的字段: {', '.join(unknown)}")
+        return fields or None
+    
+    @classmethod
+    def _row_select(cls, fields=None):
+        """只查询请求的列，默认为 to_dict() 对应的列"""
+        columns = []
+        for field in fields or Poetry.DICT_FIELDS:
+            if field == 'preview':
+                columns.append(cls._preview_expression().label('preview'))
+            else:
+                columns.append(getattr(Poetry, field))
+        return select(*columns)
+    
+    @classmethod
+    def get_all_poem_rows(cls, fields=None):
+        """获取所有诗词（字典列表）"""
+        return cls._fetch_rows(cls._row_select(fields).order_by(Poetry.created_at.desc()))
+    
+    @classmethod
+    def search_poem_rows(cls, keyword, fields=None):
+        """搜索诗词（字典列表）"""
+        return cls._fetch_rows(
+            cls._row_select(fields).where(cls._search_condition(keyword)).order_by(Poetry.created_at.desc())
+        )
+    
+    @classmethod
+    def get_recent_poem_rows(cls, limit=10, fields=None):
+        """获取最近的诗词（字典列表）"""
+        return cls._fetch_rows(cls._row_select(fields).order_by(Poetry.created_at.desc()).limit(limit))
+    
+    @classmethod
+    def get_poem_rows_page(cls, condition, page=1, per_page=20, fields=None):
+        """
+        分页获取满足条件的诗词（字典列表），按ID降序（即创建顺序）
+        
+        Args:
+            condition: 过滤条件，应能使用索引（如标签、作者）
+            page (int): 页码，从1开始
+            per_page (int): 每页数量
+            fields (list): 返回的字段
+        """
+        stmt = (
+            cls._row_select(fields)
+            .where(condition)
+            .order_by(Poetry.id.desc())
+            .limit(per_page)
+            .offset((page - 1) * per_page)
+        )
+        return cls._fetch_rows(stmt)
+    
+    @classmethod
+    def get_poem_rows_by_ids(cls, poetry_ids, fields=None):
+        """按给定ID顺序获取诗词（字典列表），不存在的ID被忽略"""
+        if not poetry_ids:
+            return []
+        
+        fields = list(fields) if fields else list(Poetry.DICT_FIELDS)
+        with_id = 'id' in fields
+        if not with_id:
+            fields.append('id')
+        
+        rows = {row['id']: row for row in cls._fetch_rows(cls._row_select(fields).where(Poetry.id.in_(poetry_ids)))}
+        result = [rows[poetry_id] for poetry_id in poetry_ids if poetry_id in rows]
+        if not with_id:
+            for row in result:
+                del row['id']
+        return result
+    
+    @classmethod
+    def get_poem_row(cls, poetry_id, fields=None):
+        """根据ID获取诗词（字典），不存在时返回None"""
+        rows = cls._fetch_rows(cls._row_select(fields).where(Poetry.id == poetry_id))
+        return rows[0] if rows else None
+    
+    @staticmethod
+    def get_poem_version(poetry_id):
+        """获取诗词的最后修改时间（用于ETag），不存在时返回None"""
+        row = db.session.execute(
+            select(Poetry.updated_at, Poetry.created_at).where(Poetry.id == poetry_id)
+        ).first()
+        if row is None:
+            return None
+        return row.updated_at or row.created_at
+    
+    @staticmethod
+    def get_poems_version():
+        """获取诗词总数和最后修改时间（用于ETag，新增、修改、删除都会改变其中之一；两者都只读索引）"""
+        count, updated_at = db.session.execute(select(func.count(Poetry.id), func.max(Poetry.updated_at))).one()
+        return count, updated_at
@@ -0,0 +1,51 @@
+"""
+接口限流服务
+"""
+
+import os
+import uuid
+from flask import current_app, request, session
+from poetry_app.utils.rate_limiter import SlidingWindowRateLimiter
+
+def init_rate_limiter(app):
+    """为应用创建限流器（默认使用 instance/rate_limits.db，所有 worker 共享，第一次限流检查时才创建文件）"""
+    path = app.config.get('RATE_LIMIT_STORAGE_PATH') or os.path.join(app.instance_path, 'rate_limits.db')
+    app.extensions['rate_limiter'] = SlidingWindowRateLimiter(path)
+
+def get_rate_limiter():
+    """获取当前应用的限流器"""
+    return current_app.extensions['rate_limiter']
+
+def _client_key():
+    """按配置使用会话或客户端IP区分客户端"""
+    if current_app.config.get('RATE_LIMIT_KEY') == 'session':
+        if 'client_id' not in session:
+            session['client_id'] = uuid.uuid4().hex
+        return f"session:{session['client_id']}"
+    return f"ip:{request.remote_addr}"
+
+def check_rate_limit(endpoint=None):
+    """
+    记录当前客户端对接口的一次请求
+
+    Args:
+        endpoint (str): RATE_LIMITS 中的接口名，默认为当前请求的 endpoint
+
+    Returns:
+        int: 0 表示放行；否则为 Retry-After 秒数
+    """
+    if not current_app.config.get('RATE_LIMIT_ENABLED', True):
+        return 0
+
+    endpoint = endpoint or request.endpoint
+    rule = current_app.config.get('RATE_LIMITS', {}).get(endpoint)
+    if not rule:
+        return 0
+
+    limit, window = rule
+    try:
+        return get_rate_limiter().hit(f"{endpoint}:{_client_key()}", limit, window)
+    except Exception as e:
+        # 限流存储不可用时不影响正常请求
+        current_app.logger.error(f"限流检查失败: {e}")
+        return 0
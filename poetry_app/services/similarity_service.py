@@ -0,0 +1,310 @@
+"""
+相似诗词索引服务
+"""
+
+import json
+import math
+import os
+import re
+import threading
+import zlib
+from contextlib import contextmanager
+from flask import current_app
+from sqlalchemy import select
+from poetry_app import db
+from poetry_app.models.poetry import Poetry
+from poetry_app.services.change_events import on_poetry_change
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class SimilarityIndex:
+    """相似诗词索引
+
+    每首诗词（标题+内容）切分为字符单字和双字，通过特征哈希映射到固定维度，
+    计算 TF-IDF 并归一化，所有向量以 float32 矩阵保存在内存映射文件中，
+    多个 worker 进程共享同一份页缓存。查询时用一次矩阵向量乘积得到全部余弦相似度。
+
+    新增、编辑和删除增量更新对应的行，IDF 沿用最近一次全量构建的统计，
+    定期运行 ``flask build-similarity-index`` 可以刷新 IDF 并压缩已删除的行。
+
+    目录结构：
+        vectors.f32  向量矩阵，形状 (capacity, dim)
+        ids.npy      每行对应的诗词ID，-1 表示空行
+        df.npy       全量构建时每个特征的文档频率
+        meta.json    维度、容量、行数、文档数
+    """
+
+    def __init__(self, directory, dim=1024):
+        self.directory = directory
+        self.dim = dim
+        self._lock = threading.RLock()
+        self._meta_mtime = None
+        self._matrix = None
+        self._ids = None
+        self._idf = None
+        self._rows = {}
+        self._count = 0
+
+    @property
+    def available(self):
+        """是否安装了 NumPy"""
+        return np is not None
+
+    def exists(self):
+        """索引文件是否已构建"""
+        return os.path.exists(self._path('meta.json'))
+
+    # ---------- 向量化 ----------
+
+    @staticmethod
+    def _ngrams(text):
+        """切分字符单字和双字，不跨越标点和空白"""
+        for run in re.findall(r'\w+', text or ''):
+            for i, char in enumerate(run):
+                yield char
+                if i + 1 < len(run):
+                    yield run[i:i + 2]
+
+    def _term_counts(self, title, content):
+        """特征哈希后的词频 {特征下标: 次数}"""
+        counts = {}
+        for gram in self._ngrams(f"{title or ''}\n{content or ''}"):
+            index = zlib.crc32(gram.encode('utf-8')) % self.dim
+            counts[index] = counts.get(index, 0) + 1
+        return counts
+
+    def _vectorize(self, counts, idf):
+        """次线性TF乘以IDF并做L2归一化"""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for index, count in counts.items():
+            vector[index] = (1.0 + math.log(count)) * idf[index]
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    # ---------- 全量构建 ----------
+
+    def build(self, batch_size=1000):
+        """
+        从数据库全量构建索引
+
+        Returns:
+            int: 索引的诗词数量
+        """
+        self._require_numpy()
+
+        poem_ids = []
+        doc_counts = []
+        df = np.zeros(self.dim, dtype=np.float32)
+        rows = db.session.execute(
+            select(Poetry.id, Poetry.title, Poetry.content).order_by(Poetry.id).execution_options(yield_per=batch_size)
+        )
+        for poem_id, title, content in rows:
+            counts = self._term_counts(title, content)
+            poem_ids.append(poem_id)
+            doc_counts.append(counts)
+            df[list(counts)] += 1
+
+        n_docs = len(poem_ids)
+        idf = (np.log((1.0 + n_docs) / (1.0 + df)) + 1.0).astype(np.float32)
+        capacity = max(64, n_docs * 2)
+
+        with self._write_lock():
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = self._path('vectors.f32.tmp')
+            matrix = np.memmap(tmp_path, dtype=np.float32, mode='w+', shape=(capacity, self.dim))
+            for row, counts in enumerate(doc_counts):
+                matrix[row] = self._vectorize(counts, idf)
+            matrix.flush()
+            del matrix
+            os.replace(tmp_path, self._path('vectors.f32'))
+
+            ids = np.full(capacity, -1, dtype=np.int64)
+            ids[:n_docs] = poem_ids
+            self._save_array('ids.npy', ids)
+            self._save_array('df.npy', df)
+            self._save_meta({'dim': self.dim, 'capacity': capacity, 'count': n_docs, 'n_docs': n_docs})
+            self._load()
+
+        current_app.logger.info(f"相似度索引构建完成: {n_docs} 首诗词")
+        return n_docs
+
+    # ---------- 增量更新 ----------
+
+    def apply_changes(self, changes):
+        """根据诗词变更增量更新索引，索引尚未构建时不做处理"""
+        if not self.available or not self.exists():
+            return
+
+        upserted = sorted(changes.get('upserted', ()))
+        deleted = changes.get('deleted', ())
+        # 提交后原会话不能执行SQL，使用独立连接读取
+        with db.engine.connect() as conn:
+            docs = conn.execute(
+                select(Poetry.id, Poetry.title, Poetry.content).where(Poetry.id.in_(upserted))
+            ).all() if upserted else []
+
+        with self._write_lock():
+            self._ensure_loaded()
+            for poem_id in deleted:
+                row = self._rows.pop(poem_id, None)
+                if row is not None:
+                    self._matrix[row] = 0
+                    self._ids[row] = -1
+
+            for poem_id, title, content in docs:
+                row = self._rows.get(poem_id)
+                if row is None:
+                    if self._count >= len(self._ids):
+                        self._grow()
+                    row = self._count
+                    self._count += 1
+                    self._ids[row] = poem_id
+                    self._rows[poem_id] = row
+                self._matrix[row] = self._vectorize(self._term_counts(title, content), self._idf)
+
+            self._matrix.flush()
+            self._save_array('ids.npy', self._ids)
+            meta = self._read_meta()
+            meta.update({'capacity': len(self._ids), 'count': self._count})
+            self._save_meta(meta)
+
+    def _grow(self):
+        """容量翻倍：复制到新文件后替换"""
+        capacity = len(self._ids) * 2
+        tmp_path = self._path('vectors.f32.tmp')
+        matrix = np.memmap(tmp_path, dtype=np.float32, mode='w+', shape=(capacity, self.dim))
+        matrix[:len(self._ids)] = self._matrix
+        matrix.flush()
+        del matrix
+        os.replace(tmp_path, self._path('vectors.f32'))
+
+        ids = np.full(capacity, -1, dtype=np.int64)
+        ids[:len(self._ids)] = self._ids
+        self._ids = ids
+        self._matrix = np.memmap(self._path('vectors.f32'), dtype=np.float32, mode='r+', shape=(capacity, self.dim))
+
+    # ---------- 查询 ----------
+
+    def similar(self, poem_id, k=5):
+        """
+        查询最相似的诗词
+
+        Args:
+            poem_id (int): 诗词ID
+            k (int): 返回数量
+
+        Returns:
+            list: [(诗词ID, 相似度)]，按相似度降序；索引尚未构建或诗词不在索引中时返回空列表
+        """
+        self._require_numpy()
+        # 全量构建需要扫描所有诗词，只由启动流程或 flask build-similarity-index 执行
+        if not self.exists():
+            return []
+        with self._lock:
+            self._ensure_loaded()
+
+            row = self._rows.get(poem_id)
+            if row is None or self._count == 0:
+                return []
+
+            matrix = self._matrix[:self._count]
+            scores = np.asarray(matrix @ matrix[row])
+            scores[row] = -1.0
+            scores[self._ids[:self._count] < 0] = -1.0
+
+            k = min(k, self._count)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(int(self._ids[i]), round(float(scores[i]), 4)) for i in top if scores[i] > 0]
+
+    # ---------- 文件读写 ----------
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _require_numpy(self):
+        if np is None:
+            raise RuntimeError('相似诗词功能需要安装 numpy')
+
+    def _ensure_loaded(self):
+        """首次使用或其他进程更新了索引时重新加载"""
+        mtime = os.stat(self._path('meta.json')).st_mtime_ns
+        if self._matrix is None or mtime != self._meta_mtime:
+            self._load()
+
+    def _load(self):
+        meta = self._read_meta()
+        if meta['dim'] != self.dim:
+            raise RuntimeError(f"索引维度 {meta['dim']} 与配置 {self.dim} 不一致，请重新构建")
+
+        self._meta_mtime = os.stat(self._path('meta.json')).st_mtime_ns
+        self._matrix = np.memmap(
+            self._path('vectors.f32'), dtype=np.float32, mode='r+', shape=(meta['capacity'], self.dim)
+        )
+        self._ids = np.load(self._path('ids.npy'))
+        df = np.load(self._path('df.npy'))
+        self._idf = (np.log((1.0 + meta['n_docs']) / (1.0 + df)) + 1.0).astype(np.float32)
+        self._count = meta['count']
+        self._rows = {
+            int(poem_id): row for row, poem_id in enumerate(self._ids[:self._count]) if poem_id >= 0
+        }
+
+    def _read_meta(self):
+        with open(self._path('meta.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_meta(self, meta):
+        tmp_path = self._path('meta.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._path('meta.json'))
+        self._meta_mtime = os.stat(self._path('meta.json')).st_mtime_ns
+
+    def _save_array(self, name, array):
+        tmp_path = self._path(f'{name}.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.save(f, array)
+        os.replace(tmp_path, self._path(name))
+
+    @contextmanager
+    def _write_lock(self):
+        """进程内线程锁，加上跨进程文件锁（POSIX）"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._path('.lock'), 'w') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def init_similarity_index(app):
+    """为应用创建相似度索引"""
+    directory = app.config.get('SIMILARITY_INDEX_DIR') or os.path.join(app.instance_path, 'similarity')
+    app.extensions['similarity_index'] = SimilarityIndex(directory, dim=app.config.get('SIMILARITY_DIM', 1024))
+
+def get_similarity_index():
+    """获取当前应用的相似度索引"""
+    return current_app.extensions['similarity_index']
+
+@on_poetry_change
+def update_similarity_index(changes):
+    """诗词变更后增量更新相似度索引"""
+    index = current_app.extensions.get('similarity_index')
+    if index is not None:
+        index.apply_changes(changes)
@@ -0,0 +1,225 @@
+"""
+搜索建议服务
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from flask import current_app
+from sqlalchemy import select
+from poetry_app import db
+from poetry_app.models.poetry import Poetry
+from poetry_app.services.change_events import on_poetry_change
+
+
+class PrefixIndex:
+    """标题/作者前缀索引
+
+    所有标题和作者按规范化（casefold）后的键排序保存在数组中，
+    查询时二分查找前缀区间，不访问数据库。
+
+    - 首次查询时从数据库构建，超过 ttl 秒后由一个后台线程重建（同步其他 worker 的写入），
+      重建期间查询继续使用旧数组
+    - 本进程的写入通过诗词变更事件增量更新，重建期间的变更在替换数组后重新应用
+    - 最多保存 max_entries 条，超出时淘汰最早的诗词标题
+    """
+
+    # 键的最大长度，过长的标题只索引前缀
+    MAX_KEY_LENGTH = 50
+
+    def __init__(self, max_entries=50000, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._pending = None
+        self._built_at = None
+        self._keys = []
+        self._entries = []
+        self._titles = {}
+        self._authors = {}
+        self._author_counts = {}
+
+    @property
+    def built(self):
+        return self._built_at is not None
+
+    @classmethod
+    def _normalize(cls, text):
+        return (text or '').strip().casefold()[:cls.MAX_KEY_LENGTH]
+
+    def suggest(self, prefix, limit=8):
+        """
+        查询以 prefix 开头的标题和作者
+
+        Returns:
+            list: [{'text': 文本, 'type': 'title'|'author', 'id': 诗词ID或None}]
+        """
+        key = self._normalize(prefix)
+        if not key:
+            return []
+
+        if not self.built:
+            # 首次构建：只有一个请求查询数据库，其他请求等待结果
+            with self._build_lock:
+                if not self.built:
+                    self.build()
+        elif time.time() - self._built_at > self.ttl:
+            self._rebuild_in_background()
+
+        results = []
+        seen = set()
+        with self._lock:
+            start = bisect_left(self._keys, key)
+            for i in range(start, len(self._keys)):
+                if not self._keys[i].startswith(key) or len(results) >= limit:
+                    break
+                kind, text, poem_id = self._entries[i]
+                if (kind, text) in seen:
+                    continue
+                seen.add((kind, text))
+                results.append({'text': text, 'type': kind, 'id': poem_id})
+        return results
+
+    def _rebuild_in_background(self):
+        """索引过期后启动一个后台线程重建，已有重建在进行时直接返回"""
+        if not self._build_lock.acquire(blocking=False):
+            return
+        # 其他请求不再触发重建，直到本次重建完成
+        self._built_at = time.time()
+        app = current_app._get_current_object()
+
+        def run():
+            with app.app_context():
+                try:
+                    self.build()
+                except Exception as e:
+                    app.logger.error(f"重建搜索建议索引失败: {e}")
+                finally:
+                    db.session.remove()
+                    self._build_lock.release()
+
+        threading.Thread(target=run, name='suggest-index-build', daemon=True).start()
+
+    def build(self):
+        """从数据库重建索引（只读取 id、title、author 三列），完成后一次性替换数组"""
+        with self._lock:
+            self._pending = []
+        try:
+            rows = db.session.execute(
+                select(Poetry.id, Poetry.title, Poetry.author)
+                .order_by(Poetry.id.desc())
+                .limit(self.max_entries)
+            ).all()
+
+            titles = {}
+            authors = {}
+            author_counts = {}
+            pairs = []
+            for poem_id, title, author in rows:
+                titles[poem_id] = title
+                pairs.append((self._normalize(title), ('title', title, poem_id)))
+                if author:
+                    authors[poem_id] = author
+                    if author not in author_counts:
+                        pairs.append((self._normalize(author), ('author', author, None)))
+                    author_counts[author] = author_counts.get(author, 0) + 1
+            pairs.sort()
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            self._keys = [key for key, _ in pairs]
+            self._entries = [entry for _, entry in pairs]
+            self._titles = titles
+            self._authors = authors
+            self._author_counts = author_counts
+            self._built_at = time.time()
+            # 查询数据库之后才提交的变更可能不在结果中，重新应用一次
+            pending, self._pending = self._pending, None
+            for deleted, changed_rows in pending:
+                self._apply(deleted, changed_rows)
+
+    def apply_changes(self, changes):
+        """根据诗词变更增量更新，尚未构建时不做处理（首次查询会读取最新数据）"""
+        if not self.built and self._pending is None:
+            return
+
+        upserted = sorted(changes.get('upserted', ()))
+        # 提交后原会话不能执行SQL，使用独立连接读取
+        with db.engine.connect() as conn:
+            rows = conn.execute(
+                select(Poetry.id, Poetry.title, Poetry.author).where(Poetry.id.in_(upserted))
+            ).all() if upserted else []
+
+        deleted = tuple(changes.get('deleted', ()))
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((deleted, rows))
+            self._apply(deleted, rows)
+
+    def _apply(self, deleted, rows):
+        for poem_id in deleted:
+            self._remove_poem(poem_id)
+        for poem_id, title, author in rows:
+            self._remove_poem(poem_id)
+            self._add_poem(poem_id, title, author)
+
+        while len(self._keys) > self.max_entries and self._titles:
+            self._remove_poem(min(self._titles))
+
+    def _add_poem(self, poem_id, title, author):
+        self._titles[poem_id] = title
+        self._insert(self._normalize(title), ('title', title, poem_id))
+        if author:
+            self._authors[poem_id] = author
+            if author not in self._author_counts:
+                self._insert(self._normalize(author), ('author', author, None))
+            self._author_counts[author] = self._author_counts.get(author, 0) + 1
+
+    def _remove_poem(self, poem_id):
+        title = self._titles.pop(poem_id, None)
+        if title is not None:
+            self._delete(self._normalize(title), ('title', title, poem_id))
+
+        author = self._authors.pop(poem_id, None)
+        if author is not None:
+            self._author_counts[author] -= 1
+            if self._author_counts[author] == 0:
+                del self._author_counts[author]
+                self._delete(self._normalize(author), ('author', author, None))
+
+    def _insert(self, key, entry):
+        index = bisect_left(self._keys, key)
+        self._keys.insert(index, key)
+        self._entries.insert(index, entry)
+
+    def _delete(self, key, entry):
+        index = bisect_left(self._keys, key)
+        while index < len(self._keys) and self._keys[index] == key:
+            if self._entries[index] == entry:
+                del self._keys[index]
+                del self._entries[index]
+                return
+            index += 1
+
+
+def init_suggest_index(app):
+    """为应用创建搜索建议索引"""
+    app.extensions['suggest_index'] = PrefixIndex(
+        max_entries=app.config.get('SUGGEST_MAX_ENTRIES', 50000),
+        ttl=app.config.get('SUGGEST_INDEX_TTL', 300),
+    )
+
+def get_suggest_index():
+    """获取当前应用的搜索建议索引"""
+    return current_app.extensions['suggest_index']
+
+@on_poetry_change
+def update_suggest_index(changes):
+    """诗词变更后增量更新搜索建议索引"""
+    index = current_app.extensions.get('suggest_index')
+    if index is not None:
+        index.apply_changes(changes)
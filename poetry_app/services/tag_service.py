@@ -0,0 +1,110 @@
+"""
+标签索引服务
+"""
+
+from flask import current_app
+from sqlalchemy import func, select
+from poetry_app import db
+from poetry_app.models.poetry import Poetry
+from poetry_app.models.tag import Tag, poetry_tags
+from poetry_app.utils.database import insert_ignore
+from poetry_app.utils.helpers import extract_keywords
+
+class TagService:
+    """标签服务类
+
+    诗词写入时从标题和内容提取关键词作为标签，
+    按标签浏览和标签统计都通过 poetry_tags 索引查询，不扫描诗词内容。
+    """
+
+    @staticmethod
+    def extract_tags(title, content):
+        """从标题和内容提取标签名（超过标签列长度的词不作为标签）"""
+        text = f"{title or ''}\n{content or ''}"
+        max_length = Tag.name.type.length
+        keywords = extract_keywords(text, max_keywords=None)
+        names = [word for word in keywords if len(word) <= max_length]
+        return names[:current_app.config.get('TAG_MAX_PER_POEM', 40)]
+
+    def assign_tags(self, poetry):
+        """
+        根据诗词当前的标题和内容重新设置标签
+
+        Args:
+            poetry (Poetry): 诗词对象（可以尚未加入会话）
+        """
+        names = self.extract_tags(poetry.title, poetry.content)
+        poetry.tags = self._get_or_create_tags(names)
+
+    @staticmethod
+    def _get_or_create_tags(names):
+        """批量获取标签，不存在的先插入（并发插入同名标签时忽略冲突）"""
+        if not names:
+            return []
+
+        existing = {tag.name: tag for tag in Tag.query.filter(Tag.name.in_(names)).all()}
+        missing = [name for name in names if name not in existing]
+        if missing:
+            db.session.execute(insert_ignore(db.session, Tag, [{'name': name} for name in missing]))
+            for tag in Tag.query.filter(Tag.name.in_(missing)).all():
+                existing[tag.name] = tag
+
+        return [existing[name] for name in names if name in existing]
+
+    @staticmethod
+    def get_facets(limit=50):
+        """
+        获取标签统计
+
+        Returns:
+            list: [{'name': 标签名, 'count': 诗词数量}]，按数量降序
+        """
+        count = func.count(poetry_tags.c.poetry_id).label('count')
+        stmt = (
+            select(Tag.name, count)
+            .join(poetry_tags, poetry_tags.c.tag_id == Tag.id)
+            .group_by(Tag.id, Tag.name)
+            .order_by(count.desc(), Tag.name)
+            .limit(limit)
+        )
+        return [{'name': name, 'count': total} for name, total in db.session.execute(stmt)]
+
+    @staticmethod
+    def get_tag_id(name):
+        """根据标签名获取标签ID，不存在时返回None"""
+        return db.session.execute(select(Tag.id).where(Tag.name == name)).scalar()
+
+    @staticmethod
+    def count_poems(tag_id):
+        """统计带有该标签的诗词数量"""
+        return db.session.execute(
+            select(func.count()).select_from(poetry_tags).where(poetry_tags.c.tag_id == tag_id)
+        ).scalar()
+
+    @staticmethod
+    def poems_condition(tag_id):
+        """带有该标签的诗词条件（按 (tag_id, poetry_id) 索引查找）"""
+        return Poetry.id.in_(
+            select(poetry_tags.c.poetry_id).where(poetry_tags.c.tag_id == tag_id)
+        )
+
+    def rebuild_all(self, batch_size=500):
+        """
+        为所有诗词重新生成标签
+
+        Returns:
+            int: 处理的诗词数量
+        """
+        total = 0
+        last_id = 0
+        while True:
+            poems = Poetry.query.filter(Poetry.id > last_id).order_by(Poetry.id).limit(batch_size).all()
+            if not poems:
+                break
+            for poetry in poems:
+                self.assign_tags(poetry)
+            db.session.commit()
+            total += len(poems)
+            last_id = poems[-1].id
+        return total
+
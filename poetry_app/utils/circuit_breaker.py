@@ -0,0 +1,104 @@
+"""
+熔断器
+"""
+
+import threading
+import time
+
+class CircuitBreaker:
+    """线程安全的熔断器
+
+    - closed：正常放行，连续失败达到 failure_threshold 次后进入 open
+    - open：直接拒绝，经过 recovery_timeout 秒后进入 half_open
+    - half_open：只放行一个探测请求，成功则恢复 closed，失败则重新 open；
+      探测请求超过 recovery_timeout 秒仍未返回结果时允许新的探测
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=5, recovery_timeout=60, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._probe_started_at = None
+        self._rejected = 0
+        self._last_error = None
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._probe_started_at = None
+        return self._state
+
+    def allow_request(self):
+        """
+        是否放行本次调用
+
+        放行后必须调用 record_success() 或 record_failure() 报告结果。
+
+        Returns:
+            bool: 放行返回True，熔断中返回False
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN:
+                now = self._clock()
+                if self._probe_started_at is None or now - self._probe_started_at >= self.recovery_timeout:
+                    self._probe_started_at = now
+                    return True
+            self._rejected += 1
+            return False
+
+    def record_success(self):
+        """报告调用成功（服务可达），恢复为 closed"""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._opened_at = None
+            self._probe_started_at = None
+
+    def record_failure(self, error=None):
+        """报告调用失败，探测失败或连续失败达到阈值时进入 open
+
+        只记录异常类型：状态会显示在公开的状态页面和统计接口上，异常信息可能包含
+        代理地址、请求内容或上游响应，完整信息由调用方写入日志。
+        """
+        with self._lock:
+            self._last_error = type(error).__name__ if error is not None else None
+            self._failures += 1
+            if self._current_state() == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self._probe_started_at = None
+
+    def snapshot(self):
+        """当前状态，用于状态页面和统计接口"""
+        with self._lock:
+            state = self._current_state()
+            retry_after = None
+            if state == self.OPEN:
+                retry_after = round(max(self.recovery_timeout - (self._clock() - self._opened_at), 0), 1)
+            return {
+                'name': self.name,
+                'state': state,
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'recovery_timeout': self.recovery_timeout,
+                'retry_after_seconds': retry_after,
+                'rejected_calls': self._rejected,
+                'last_error': self._last_error,
+            }
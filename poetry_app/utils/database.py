@@ -0,0 +1,173 @@
+"""
+数据库引擎配置与读写分离
+"""
+
+import random
+import time
+from flask import g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, insert
+from sqlalchemy.engine import make_url
+
+REPLICA_BIND_PREFIX = 'replica_'
+
+
+def is_sqlite_uri(uri):
+    """判断数据库地址是否为SQLite"""
+    return make_url(uri).get_backend_name() == 'sqlite'
+
+
+def configure_engine_options(app):
+    """
+    根据数据库类型补全引擎参数，需要在 db.init_app 之前调用
+
+    SQLite 使用默认连接池；其他数据库（PostgreSQL、MySQL）
+    按配置设置连接池大小、回收时间和连接预检。
+    显式配置的 SQLALCHEMY_ENGINE_OPTIONS 优先。
+    """
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI')
+    if not uri or is_sqlite_uri(uri):
+        return
+
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    options.setdefault('pool_size', app.config['DB_POOL_SIZE'])
+    options.setdefault('max_overflow', app.config['DB_MAX_OVERFLOW'])
+    options.setdefault('pool_recycle', app.config['DB_POOL_RECYCLE'])
+    options.setdefault('pool_pre_ping', app.config['DB_POOL_PRE_PING'])
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def configure_replica_binds(app):
+    """
+    把 SQLALCHEMY_REPLICA_URIS 中的只读副本注册为 replica_N 绑定，
+    需要在 db.init_app 之前调用
+    """
+    replica_uris = app.config.get('SQLALCHEMY_REPLICA_URIS') or []
+    if not replica_uris:
+        return
+
+    pool_options = {}
+    primary_options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+    for key in ('pool_size', 'max_overflow', 'pool_recycle', 'pool_pre_ping'):
+        if key in primary_options:
+            pool_options[key] = primary_options[key]
+
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    for index, uri in enumerate(replica_uris):
+        if is_sqlite_uri(uri):
+            binds[f'{REPLICA_BIND_PREFIX}{index}'] = uri
+        else:
+            binds[f'{REPLICA_BIND_PREFIX}{index}'] = dict(pool_options, url=uri)
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+
+def insert_ignore(session, model, rows):
+    """生成忽略唯一约束冲突的批量插入语句"""
+    dialect = session.get_bind(mapper=model).dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        return dialect_insert(model).values(rows).on_conflict_do_nothing()
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        return dialect_insert(model).values(rows).on_conflict_do_nothing()
+    if dialect == 'mysql':
+        return insert(model).values(rows).prefix_with('IGNORE')
+    return insert(model).values(rows)
+
+
+class RoutingSession(Session):
+    """读写分离会话
+
+    请求标记为只读（见 use_replica_for_reads）时，查询发往随机选中的只读副本，
+    同一请求内固定使用同一个副本；flush 及其他情况一律使用主库。
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _reads_from_replica():
+            replica_key = g.get('db_replica_key')
+            if replica_key is None:
+                replica_keys = [
+                    key for key in self._db.engines
+                    if key and key.startswith(REPLICA_BIND_PREFIX)
+                ]
+                if replica_keys:
+                    replica_key = g.db_replica_key = random.choice(replica_keys)
+            if replica_key is not None:
+                return self._db.engines[replica_key]
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _reads_from_replica():
+    """当前请求是否读取只读副本"""
+    return has_request_context() and g.get('db_use_replica', False)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_request_wrote(db_session, flush_context):
+    """记录当前请求写入过数据库，用于读己之写"""
+    if has_request_context():
+        g.db_wrote = True
+
+
+def use_replica_for_reads():
+    """
+    蓝图 before_request 钩子：GET/HEAD 请求读取只读副本
+
+    同一会话最近写入过数据时（REPLICA_STICKY_SECONDS 内）继续读取主库，
+    保证用户能立即看到自己创建或修改的内容。
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return
+    if session.get('db_primary_until', 0) > time.time():
+        return
+    g.db_use_replica = True
+
+
+def register_read_write_routing(app, db):
+    """写入后在会话中记录粘滞截止时间，需要在 db.init_app 之后调用"""
+    # 副本只用于读取，init_app 为其创建的空元数据会让 create_all 遍历到副本绑定
+    for key in list(db.metadatas):
+        if key and key.startswith(REPLICA_BIND_PREFIX) and not db.metadatas[key].tables:
+            del db.metadatas[key]
+
+    if not app.config.get('SQLALCHEMY_REPLICA_URIS'):
+        return
+
+    @app.after_request
+    def stick_to_primary_after_write(response):
+        if g.get('db_wrote'):
+            session['db_primary_until'] = time.time() + app.config['REPLICA_STICKY_SECONDS']
+        return response
+
+
+def sqlite_pragmas(config):
+    """根据配置生成连接时执行的SQLite PRAGMA列表"""
+    pragmas = [
+        ('journal_mode', config.get('SQLITE_JOURNAL_MODE')),
+        ('synchronous', config.get('SQLITE_SYNCHRONOUS')),
+        ('busy_timeout', config.get('SQLITE_BUSY_TIMEOUT')),
+        ('mmap_size', config.get('SQLITE_MMAP_SIZE')),
+        ('cache_size', config.get('SQLITE_CACHE_SIZE')),
+    ]
+    return [(name, value) for name, value in pragmas if value is not None]
+
+
+def apply_sqlite_pragmas(app, db):
+    """为应用的所有SQLite引擎注册连接时的PRAGMA设置，需要在 db.init_app 之后调用"""
+    pragmas = sqlite_pragmas(app.config)
+    if not pragmas:
+        return
+
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', set_pragmas)
@@ -93,13 +93,20 @@ def clean_text(text):
     
     return text
 
+# 常见虚词和代词，不作为关键词
+CJK_STOPWORDS = frozenset('之乎者也矣焉哉兮而以其不无有一了的是在为与于此亦又乃所若则即皆我你他她它们这那')
+
 def extract_keywords(text, max_keywords=5):
     """
     从文本中提取关键词
     
+    中文没有空格分词，连续的汉字按单字和相邻双字（n-gram）切分，
+    过滤虚词后按出现次数排序，次数相同时先出现的优先；
+    其他文字仍按空白分词，保留长度不小于2的词。
+    
     Args:
         text: 文本内容
-        max_keywords: 最大关键词数量
+        max_keywords: 最大关键词数量，None 表示全部
         
     Returns:
         list: 关键词列表
@@ -107,21 +114,32 @@ def extract_keywords(text, max_keywords=5):
     if not text:
         return []
     
-    # 简单的关键词提取（可以后续优化为更复杂的算法）
-    # 移除标点符号和数字
-    clean_text = re.sub(r'[^\u4e00-\u9fff\w\s]', '', text)
-    
-    # 按空格和换行分割
-    words = re.split(r'[\s\n]+', clean_text)
-    
-    # 过滤掉长度小于2的词
-    words = [word for word in words if len(word) >= 2]
-    
-    # 统计词频
+    # 统计词频和首次出现位置
     word_count = {}
-    for word in words:
+    first_seen = {}
+    
+    def add(word, position):
         word_count[word] = word_count.get(word, 0) + 1
+        first_seen.setdefault(word, position)
+    
+    # 汉字片段：标点和空白自然把诗句分开，n-gram 不跨句
+    for match in re.finditer(r'[\u4e00-\u9fff]+', text):
+        run = match.group()
+        for i, char in enumerate(run):
+            position = match.start() + i
+            if char not in CJK_STOPWORDS:
+                add(char, position)
+            bigram = run[i:i + 2]
+            if len(bigram) == 2 and not (set(bigram) & CJK_STOPWORDS):
+                add(bigram, position)
+    
+    # 其他文字：移除汉字和标点后按空格和换行分割
+    other_text = re.sub(r'[\u4e00-\u9fff]+|[^\w\s]', ' ', text)
+    for match in re.finditer(r'\S+', other_text):
+        word = match.group()
+        if len(word) >= 2:
+            add(word, match.start())
     
     # 按词频排序并返回前N个
-    sorted_words = sorted(word_count.items(), key=lambda x: x[1], reverse=True)
-    return [word for word, count in sorted_words[:max_keywords]]
+    sorted_words = sorted(word_count, key=lambda word: (-word_count[word], first_seen[word]))
+    return sorted_words[:max_keywords] if max_keywords is not None else sorted_words
@@ -0,0 +1,65 @@
+"""
+JSON序列化
+"""
+
+from datetime import date
+from flask.json.provider import DefaultJSONProvider, _default as flask_default
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(o):
+    """日期时间统一序列化为ISO 8601格式，与 Poetry.to_dict() 保持一致"""
+    if isinstance(o, date):
+        return o.isoformat()
+    return flask_default(o)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON序列化提供者
+
+    JSON_BACKEND 为 'orjson' 且已安装 orjson 时使用 orjson，
+    否则回退到标准库 json。两种实现都把 datetime 序列化为ISO格式，
+    因此接口可以直接返回数据库查询得到的原始值。
+    """
+
+    default = staticmethod(_default)
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.use_orjson = orjson is not None and app.config.get('JSON_BACKEND', 'orjson') == 'orjson'
+
+    def _orjson_option(self, indent=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        """序列化为字符串，带有orjson不支持的参数时回退到标准库"""
+        if not self.use_orjson or set(kwargs) - {'indent', 'separators'}:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(
+            obj, default=self.default, option=self._orjson_option(kwargs.get('indent'))
+        ).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        """反序列化"""
+        if not self.use_orjson or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """生成JSON响应，orjson直接输出bytes，省去一次编码"""
+        if not self.use_orjson:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._orjson_option(indent))
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,32 @@
+"""
+数据库结构升级
+
+项目没有使用迁移工具，db.create_all() 只会创建缺少的表，
+已有表上新增的列和索引在这里补齐。所有操作可重复执行。
+"""
+
+from sqlalchemy import inspect, text
+
+
+def upgrade_schema(db):
+    """
+    为旧数据库补充新增的列和索引，需要在 db.create_all() 之后调用
+
+    Returns:
+        list: 本次新增的列名（表名.列名）
+    """
+    from poetry_app.models.poetry import Poetry
+
+    inspector = inspect(db.engine)
+    if not inspector.has_table(Poetry.__tablename__):
+        return []
+
+    added = []
+    columns = {column['name'] for column in inspector.get_columns(Poetry.__tablename__)}
+    with db.engine.begin() as conn:
+        if 'author_id' not in columns:
+            conn.execute(text('ALTER TABLE poetry ADD COLUMN author_id INTEGER REFERENCES authors(id)'))
+            added.append('poetry.author_id')
+        for index in Poetry.__table__.indexes:
+            index.create(conn, checkfirst=True)
+    return added
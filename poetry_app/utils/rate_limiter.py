@@ -0,0 +1,98 @@
+"""
+滑动窗口限流器
+"""
+
+import math
+import os
+import sqlite3
+import threading
+import time
+
+class SlidingWindowRateLimiter:
+    """基于本地 SQLite 文件的滑动窗口限流器
+
+    每次请求记录一条 (key, 时间戳)，窗口内记录数达到上限时拒绝。检查和写入在同一个
+    BEGIN IMMEDIATE 事务中完成，多个 worker 进程共用同一个文件时也按同一个计数限流。
+    连接按线程和进程ID创建，fork 出的 worker 不会复用主进程的连接。
+    """
+
+    # 每记录多少次请求清理一次所有客户端的过期记录
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path, busy_timeout=5.0, clock=time.time):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._clock = clock
+        self._local = threading.local()
+        self._hits = 0
+        self._max_window = 0
+
+    def _connection(self):
+        # 第一次记录请求时才创建存储文件，未触发限流的进程不会产生文件
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rate_limit_hits (
+                    key TEXT NOT NULL,
+                    ts REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_limit_hits_key_ts ON rate_limit_hits (key, ts)")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def hit(self, key, limit, window):
+        """
+        记录一次请求并判断是否放行
+
+        Args:
+            key (str): 限流键（接口 + 客户端）
+            limit (int): 窗口内最多允许的请求数
+            window (float): 窗口长度（秒）
+
+        Returns:
+            int: 0 表示放行；否则为需要等待的秒数（被拒绝的请求不计数）
+        """
+        now = self._clock()
+        self._max_window = max(self._max_window, window)
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM rate_limit_hits WHERE key = ? AND ts <= ?", (key, now - window))
+            count, oldest = conn.execute(
+                "SELECT COUNT(*), MIN(ts) FROM rate_limit_hits WHERE key = ?", (key,)
+            ).fetchone()
+            if count >= limit:
+                conn.execute("COMMIT")
+                # 窗口内第 count-limit+1 早的记录过期后才会空出名额
+                if count > limit:
+                    oldest = conn.execute(
+                        "SELECT ts FROM rate_limit_hits WHERE key = ? ORDER BY ts LIMIT 1 OFFSET ?",
+                        (key, count - limit)
+                    ).fetchone()[0]
+                return max(math.ceil(oldest + window - now), 1)
+
+            conn.execute("INSERT INTO rate_limit_hits (key, ts) VALUES (?, ?)", (key, now))
+            self._hits += 1
+            if self._hits % self.PRUNE_EVERY == 0:
+                conn.execute("DELETE FROM rate_limit_hits WHERE ts <= ?", (now - self._max_window,))
+            conn.execute("COMMIT")
+            return 0
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def reset(self, key=None):
+        """清除指定限流键（默认全部）的记录"""
+        conn = self._connection()
+        if key is None:
+            conn.execute("DELETE FROM rate_limit_hits")
+        else:
+            conn.execute("DELETE FROM rate_limit_hits WHERE key = ?", (key,))
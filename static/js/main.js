@@ -15,6 +15,8 @@ const PoetryApp = {
         this.bindEvents();
         this.initTooltips();
         this.initSearch();
+        this.initSuggest();
+        this.initServiceWorker();
     },
     
     // 绑定事件
@@ -146,6 +148,82 @@ const PoetryApp = {
         }
     },
     
+    // 初始化输入建议（标题/作者前缀）
+    initSuggest: function() {
+        const input = document.querySelector('input[data-suggest]');
+        if (!input || !input.list) {
+            return;
+        }
+        
+        const datalist = input.list;
+        const cache = new Map();
+        let suggestTimeout;
+        let controller;
+        
+        const render = items => {
+            datalist.innerHTML = '';
+            items.forEach(item => {
+                const option = document.createElement('option');
+                option.value = item.text;
+                option.label = item.type === 'author' ? '作者' : '标题';
+                datalist.appendChild(option);
+            });
+        };
+        
+        input.addEventListener('input', () => {
+            clearTimeout(suggestTimeout);
+            const prefix = input.value.trim();
+            if (!prefix) {
+                render([]);
+                return;
+            }
+            if (cache.has(prefix)) {
+                render(cache.get(prefix));
+                return;
+            }
+            
+            suggestTimeout = setTimeout(() => {
+                // 取消上一次未完成的请求，避免旧结果覆盖新结果
+                if (controller) {
+                    controller.abort();
+                }
+                controller = new AbortController();
+                
+                fetch(`${this.config.apiBaseUrl}/suggest?q=${encodeURIComponent(prefix)}`, { signal: controller.signal })
+                    .then(response => response.json())
+                    .then(result => {
+                        if (result.success) {
+                            cache.set(prefix, result.data);
+                            render(result.data);
+                        }
+                    })
+                    .catch(error => {
+                        if (error.name !== 'AbortError') {
+                            console.error('获取搜索建议失败:', error);
+                        }
+                    });
+            }, 150);
+        });
+    },
+    
+    // 注册 Service Worker（缓存配图和接口数据）
+    initServiceWorker: function() {
+        if (!('serviceWorker' in navigator)) {
+            return;
+        }
+        
+        navigator.serviceWorker.register('/sw.js', { scope: '/' })
+            .catch(error => console.error('注册 Service Worker 失败:', error));
+        
+        // 诗词详情页：通知 Service Worker 预先缓存该诗词的数据和配图
+        const match = window.location.pathname.match(/^\/poetry\/(\d+)$/);
+        if (match) {
+            navigator.serviceWorker.ready.then(registration => {
+                registration.active.postMessage({ type: 'poem-viewed', id: parseInt(match[1], 10) });
+            });
+        }
+    },
+    
     // 执行搜索
     performSearch: function(keyword) {
         const url = new URL(window.location);
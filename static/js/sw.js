@@ -0,0 +1,171 @@
+/**
+ * 诗歌创作平台 Service Worker
+ *
+ * - 配图（static/images 下的 UUID 文件名，内容不会改变）：缓存优先
+ * - API JSON：先返回缓存，同时带 If-None-Match 向服务器验证，
+ *   诗词的 updated_at 改变（ETag 不同）时更新缓存
+ * - 诗词详情页：网络优先，离线时使用缓存；最近查看的诗词预先缓存 JSON 和配图
+ */
+
+const CACHE_VERSION = 'v1';
+const IMAGE_CACHE = `poetry-images-${CACHE_VERSION}`;
+const API_CACHE = `poetry-api-${CACHE_VERSION}`;
+const PAGE_CACHE = `poetry-pages-${CACHE_VERSION}`;
+const CACHES = [IMAGE_CACHE, API_CACHE, PAGE_CACHE];
+
+// 各缓存最多保留的条目数（超过后删除最早加入的）
+const MAX_IMAGES = 200;
+const MAX_API_RESPONSES = 100;
+const MAX_RECENT_POEMS = 20;
+
+const IMAGE_PATTERN = /^\/static\/images\/[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\.\w+$/;
+const POEM_PAGE_PATTERN = /^\/poetry\/\d+$/;
+// 实时数据和管理接口不缓存
+const API_EXCLUDED = ['/api/admin/', '/api/stats', '/api/suggest'];
+
+self.addEventListener('install', () => {
+    self.skipWaiting();
+});
+
+self.addEventListener('activate', event => {
+    // 删除旧版本的缓存
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(
+                keys.filter(key => key.startsWith('poetry-') && !CACHES.includes(key))
+                    .map(key => caches.delete(key))
+            ))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) {
+        return;
+    }
+
+    if (request.method !== 'GET') {
+        // 创建、编辑、删除诗词后丢弃已缓存的列表数据
+        if (url.pathname.startsWith('/poetry/') || url.pathname.startsWith('/api/')) {
+            event.waitUntil(caches.delete(API_CACHE));
+        }
+        return;
+    }
+
+    if (IMAGE_PATTERN.test(url.pathname)) {
+        event.respondWith(cacheFirst(request, event));
+    } else if (url.pathname.startsWith('/api/') && !API_EXCLUDED.some(prefix => url.pathname.startsWith(prefix))) {
+        event.respondWith(staleWhileRevalidate(request, event));
+    } else if (request.mode === 'navigate' && POEM_PAGE_PATTERN.test(url.pathname)) {
+        event.respondWith(networkFirst(request, event));
+    }
+});
+
+self.addEventListener('message', event => {
+    const message = event.data || {};
+    if (message.type === 'poem-viewed' && Number.isInteger(message.id)) {
+        event.waitUntil(precachePoem(message.id));
+    }
+});
+
+// 写入缓存：有 event 时在后台完成，不等待响应体下载完再返回给页面
+function storeResponse(cacheName, key, response, maxEntries, event) {
+    const store = caches.open(cacheName)
+        .then(cache => cache.delete(key).then(() => cache.put(key, response)))
+        .then(() => trimCache(cacheName, maxEntries));
+    if (event) {
+        event.waitUntil(store.catch(() => {}));
+        return Promise.resolve();
+    }
+    return store;
+}
+
+// 缓存优先：配图文件名是 UUID，重新生成配图会得到新的文件名
+async function cacheFirst(request, event) {
+    const cached = await caches.match(request, { cacheName: IMAGE_CACHE });
+    if (cached) {
+        return cached;
+    }
+
+    const response = await fetch(request);
+    if (response.ok) {
+        await storeResponse(IMAGE_CACHE, request, response.clone(), MAX_IMAGES, event);
+    }
+    return response;
+}
+
+// 先返回缓存，后台验证：304 表示缓存仍是最新版本
+async function staleWhileRevalidate(request, event) {
+    const cache = await caches.open(API_CACHE);
+    const cached = await cache.match(request);
+    const revalidation = revalidate(cache, request, cached);
+
+    if (cached) {
+        event.waitUntil(revalidation.catch(() => {}));
+        return cached;
+    }
+    return revalidation;
+}
+
+async function revalidate(cache, request, cached) {
+    const headers = new Headers(request.headers);
+    const etag = cached && cached.headers.get('ETag');
+    if (etag) {
+        headers.set('If-None-Match', etag);
+    }
+
+    const response = await fetch(request.url, { headers, credentials: 'same-origin', cache: 'no-store' });
+    if (response.status === 304 && cached) {
+        return cached;
+    }
+    if (response.ok) {
+        await storeResponse(API_CACHE, request, response.clone(), MAX_API_RESPONSES);
+    } else if (response.status === 404) {
+        // 诗词已被删除
+        await cache.delete(request);
+    }
+    return response;
+}
+
+// 网络优先：每次打开详情页都获取最新内容，离线时使用最近查看时缓存的页面
+async function networkFirst(request, event) {
+    try {
+        const response = await fetch(request);
+        if (response.ok) {
+            // 先删除再放入，使其成为最近查看的一条
+            await storeResponse(PAGE_CACHE, request.url, response.clone(), MAX_RECENT_POEMS, event);
+        }
+        return response;
+    } catch (error) {
+        const cached = await caches.match(request.url, { cacheName: PAGE_CACHE });
+        if (cached) {
+            return cached;
+        }
+        throw error;
+    }
+}
+
+// 预先缓存最近查看的诗词JSON和配图，再次访问时只需一次 304 验证
+async function precachePoem(id) {
+    const cache = await caches.open(API_CACHE);
+    const request = new Request(`/api/poems/${id}`);
+    const response = await revalidate(cache, request, await cache.match(request));
+    if (!response.ok) {
+        return;
+    }
+
+    const poem = (await response.clone().json()).data;
+    if (poem && poem.image_path) {
+        await cacheFirst(new Request(`/static/images/${poem.image_path}`));
+    }
+}
+
+async function trimCache(cacheName, maxEntries) {
+    const cache = await caches.open(cacheName);
+    const keys = await cache.keys();
+    for (const request of keys.slice(0, Math.max(keys.length - maxEntries, 0))) {
+        await cache.delete(request);
+    }
+}
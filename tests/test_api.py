@@ -0,0 +1,98 @@
+"""
+API接口测试
+"""
+
+import json
+import unittest
+from sqlalchemy import inspect
+from config import Config
+from poetry_app import create_app, db
+from poetry_app.models.poetry import Poetry
+from poetry_app.services.poetry_service import PoetryService
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+
+class TestPoemsApi(unittest.TestCase):
+    """诗词接口测试类"""
+
+    config_class = TestConfig
+
+    def setUp(self):
+        """测试前准备"""
+        self.app = create_app(self.config_class)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.poem = Poetry(title='静夜思', content='床前明月光，疑是地上霜。', author='李白')
+        db.session.add(self.poem)
+        db.session.add(Poetry(title='春晓', content='春眠不觉晓，处处闻啼鸟。', author='孟浩然'))
+        db.session.commit()
+
+    def tearDown(self):
+        """测试后清理"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_list_matches_to_dict(self):
+        """测试列表接口的行数据与 to_dict() 输出一致"""
+        data = self.client.get('/api/poems').get_json()
+        self.assertEqual(data['count'], 2)
+        by_id = {poem['id']: poem for poem in data['data']}
+        self.assertEqual(by_id[self.poem.id], self.poem.to_dict())
+
+    def test_search_and_recent(self):
+        """测试搜索和最近诗词接口"""
+        data = self.client.get('/api/poems/search?q=明月').get_json()
+        self.assertEqual([poem['title'] for poem in data['data']], ['静夜思'])
+
+        data = self.client.get('/api/poems/recent?limit=1').get_json()
+        self.assertEqual(data['count'], 1)
+
+    def test_response_is_valid_json(self):
+        """测试响应可以被标准库解析，日期为ISO格式"""
+        response = self.client.get(f'/api/poems/{self.poem.id}')
+        data = json.loads(response.data)
+        self.assertEqual(data['data']['created_at'], self.poem.created_at.isoformat())
+
+    def test_sparse_fieldset(self):
+        """测试 fields 参数只返回请求的字段"""
+        data = self.client.get('/api/poems?fields=id,title,preview').get_json()
+        self.assertEqual(set(data['data'][0]), {'id', 'title', 'preview'})
+
+        data = self.client.get(f'/api/poems/{self.poem.id}?fields=title').get_json()
+        self.assertEqual(data['data'], {'title': '静夜思'})
+
+    def test_invalid_field(self):
+        """测试不支持的字段返回400"""
+        response = self.client.get('/api/poems/recent?fields=title,password')
+        self.assertEqual(response.status_code, 400)
+
+    def test_preview_computed_in_sql(self):
+        """测试列表视图的预览由SQL截取且不加载完整内容"""
+        db.session.add(Poetry(title='长诗', content='长' * 150))
+        db.session.commit()
+        db.session.expunge_all()
+
+        poems = {poem.title: poem for poem in PoetryService.iter_poems(list_view=True)}
+        self.assertEqual(poems['长诗'].preview, '长' * PoetryService.PREVIEW_LENGTH + '...')
+        self.assertEqual(poems['静夜思'].preview, '床前明月光，疑是地上霜。')
+        self.assertIn('content', inspect(poems['长诗']).unloaded)
+
+        response = self.client.get('/')
+        self.assertIn('床前明月光，疑是地上霜。', response.get_data(as_text=True))
+
+class StdlibJsonConfig(TestConfig):
+    JSON_BACKEND = 'json'
+
+class TestPoemsApiStdlibJson(TestPoemsApi):
+    """标准库JSON后端下的诗词接口测试类"""
+
+    config_class = StdlibJsonConfig
+
+if __name__ == '__main__':
+    unittest.main()
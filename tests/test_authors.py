@@ -0,0 +1,138 @@
+"""
+作者表测试
+"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from config import Config
+from poetry_app import create_app, db
+from poetry_app.models.author import Author
+from poetry_app.models.poetry import Poetry
+from poetry_app.services.author_service import AuthorService
+from poetry_app.utils.migrations import upgrade_schema
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+
+class TestAuthors(unittest.TestCase):
+    """作者表测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.li_1 = self._add('静夜思', '李白')
+        self.li_2 = self._add('望庐山瀑布', '李白')
+        self.du = self._add('春夜喜雨', '杜甫')
+
+    def tearDown(self):
+        """测试后清理"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _add(self, title, author):
+        poem = Poetry(title=title, content='内容', author=author)
+        db.session.add(poem)
+        db.session.commit()
+        return poem
+
+    def _count(self, name):
+        db.session.expire_all()
+        author = Author.query.filter_by(name=name).first()
+        return author.poem_count if author else None
+
+    def test_counts_maintained_on_write(self):
+        """测试新增、改作者、删除时维护作者关联和诗词数量"""
+        self.assertEqual(self.li_1.author_id, self.li_2.author_id)
+        self.assertEqual(self._count('李白'), 2)
+
+        self.li_2.author = '杜甫'
+        db.session.commit()
+        self.assertEqual(self._count('李白'), 1)
+        self.assertEqual(self._count('杜甫'), 2)
+
+        db.session.delete(self.du)
+        db.session.commit()
+        self.assertEqual(self._count('杜甫'), 1)
+
+        anonymous = Poetry(title='无题', content='内容')
+        db.session.add(anonymous)
+        db.session.commit()
+        self.assertEqual(anonymous.author, '匿名')
+        self.assertEqual(self._count('匿名'), 1)
+
+        self.assertEqual([poem.title for poem in Poetry.get_by_author('杜甫')], ['望庐山瀑布'])
+        self.assertEqual(len(Poetry.search_by_author('杜')), 1)
+
+    def test_author_endpoints(self):
+        """测试作者列表和按作者分页"""
+        data = self.client.get('/api/authors').get_json()
+        self.assertEqual(data['total'], 2)
+        self.assertEqual(data['data'][0]['name'], '李白')
+        self.assertEqual(data['data'][0]['poem_count'], 2)
+
+        author_id = self.li_1.author_id
+        data = self.client.get(f'/api/authors/{author_id}/poems?per_page=1&fields=title').get_json()
+        self.assertEqual(data['total'], 2)
+        self.assertEqual(data['data'], [{'title': '望庐山瀑布'}])
+        self.assertEqual(data['author']['name'], '李白')
+
+        self.assertEqual(self.client.get('/api/authors/999/poems').status_code, 404)
+        self.assertEqual(self.client.get('/api/stats').get_json()['data']['total_authors'], 2)
+
+    def test_backfill_recomputes(self):
+        """测试补全未关联的诗词并重新计算数量"""
+        db.session.execute(db.update(Poetry).values(author_id=None))
+        db.session.execute(db.update(Author).values(poem_count=0))
+        db.session.commit()
+
+        self.assertEqual(AuthorService().backfill(), 3)
+        self.assertEqual(self._count('李白'), 2)
+        self.assertEqual(self._count('杜甫'), 1)
+        self.assertEqual(AuthorService().backfill(), 0)
+
+class TestAuthorMigration(unittest.TestCase):
+    """旧数据库升级测试类"""
+
+    def test_upgrade_legacy_database(self):
+        """测试为没有 author_id 列的旧诗词表补列并补全作者"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'legacy.db')
+            conn = sqlite3.connect(path)
+            conn.execute(
+                'CREATE TABLE poetry (id INTEGER PRIMARY KEY, title VARCHAR(200) NOT NULL, content TEXT NOT NULL, '
+                'author VARCHAR(100), created_at DATETIME, updated_at DATETIME, '
+                'image_path VARCHAR(500), image_prompt TEXT)'
+            )
+            conn.executemany(
+                'INSERT INTO poetry (title, content, author) VALUES (?, ?, ?)',
+                [('静夜思', '内容', '李白'), ('春晓', '内容', '孟浩然'), ('将进酒', '内容', '李白')],
+            )
+            conn.commit()
+            conn.close()
+
+            class LegacyConfig(TestConfig):
+                SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+
+            app = create_app(LegacyConfig)
+            with app.app_context():
+                db.create_all()
+                self.assertEqual(upgrade_schema(db), ['poetry.author_id'])
+                self.assertEqual(upgrade_schema(db), [])
+                indexes = {index['name'] for index in db.inspect(db.engine).get_indexes('poetry')}
+                self.assertTrue({'ix_poetry_author_id', 'ix_poetry_updated_at'} <= indexes)
+                self.assertEqual(AuthorService().backfill(), 3)
+                self.assertEqual(Author.query.filter_by(name='李白').one().poem_count, 2)
+                db.session.remove()
+                db.engine.dispose()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+配图批量补全测试
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+from config import Config
+from poetry_app import create_app, db
+from poetry_app.models.poetry import Poetry
+from poetry_app.services.backfill_service import ImageBackfillService
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    ADMIN_TOKEN = None
+
+class TestImageBackfill(unittest.TestCase):
+    """配图补全服务测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        TestConfig.UPLOAD_FOLDER = self.tmpdir.name
+        TestConfig.BACKFILL_CHECKPOINT_PATH = os.path.join(self.tmpdir.name, 'checkpoint.json')
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        # 一首有图，一首图片文件丢失，三首无图
+        with open(os.path.join(self.tmpdir.name, 'exists.png'), 'wb') as f:
+            f.write(b'png')
+        db.session.add(Poetry(title='有图', content='内容', image_path='exists.png'))
+        db.session.add(Poetry(title='丢图', content='内容', image_path='missing.png'))
+        for i in range(3):
+            db.session.add(Poetry(title=f'无图{i}', content='内容'))
+        db.session.commit()
+
+        self.ai_service = mock.Mock()
+        self.ai_service.generate_image_from_poetry.return_value = 'new.png'
+        self.service = ImageBackfillService(ai_service=self.ai_service)
+
+    def tearDown(self):
+        """测试后清理"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.tmpdir.cleanup()
+
+    def test_find_candidates(self):
+        """测试筛选无图和图片文件丢失的诗词"""
+        self.assertEqual(self.service.find_candidates(), [2, 3, 4, 5])
+        self.assertEqual(self.service.find_candidates(after_id=3), [4, 5])
+
+    def test_budget_checkpoint_and_resume(self):
+        """测试配额预算用完后从检查点继续"""
+        result = self.service.run(concurrency=2, budget=2)
+        self.assertEqual(result['status'], 'budget_exhausted')
+        self.assertEqual(result['succeeded'], 2)
+        self.assertEqual(result['last_id'], 3)
+        self.assertTrue(os.path.exists(TestConfig.BACKFILL_CHECKPOINT_PATH))
+
+        result = self.service.run(concurrency=2)
+        self.assertEqual(result['status'], 'finished')
+        self.assertEqual(result['total'], 2)
+        self.assertEqual(self.ai_service.generate_image_from_poetry.call_count, 4)
+        self.assertEqual(Poetry.query.filter(Poetry.image_path == 'new.png').count(), 4)
+        # 完成后清除继续位置，保留最终进度
+        self.assertEqual(self.service._load_checkpoint(TestConfig.BACKFILL_CHECKPOINT_PATH)['last_id'], 0)
+        self.assertEqual(ImageBackfillService().progress['status'], 'finished')
+
+    def test_failed_generation_is_counted(self):
+        """测试生成失败计入失败数"""
+        self.ai_service.generate_image_from_poetry.return_value = None
+        result = self.service.run(concurrency=3)
+        self.assertEqual(result['failed'], 4)
+        self.assertEqual(result['processed'], 4)
+        self.assertIsNotNone(result['eta_seconds'])
+
+    def test_progress_shared_between_processes(self):
+        """测试其他进程（实例）可以读取进度，持有文件锁时不能重复运行"""
+        other = ImageBackfillService(ai_service=self.ai_service)
+        self.assertEqual(other.progress['status'], 'idle')
+
+        lock_file = ImageBackfillService._acquire_file_lock(TestConfig.BACKFILL_CHECKPOINT_PATH)
+        try:
+            self.assertTrue(other.is_running)
+            with self.assertRaises(RuntimeError):
+                other.run()
+        finally:
+            lock_file.close()
+        self.assertFalse(other.is_running)
+
+        self.service.run(concurrency=2, budget=2)
+        progress = other.progress
+        self.assertEqual(progress['status'], 'budget_exhausted')
+        self.assertEqual(progress['succeeded'], 2)
+
+    def test_stop_from_other_process(self):
+        """测试其他进程发出的停止请求在下一批之前生效"""
+        other = ImageBackfillService(ai_service=self.ai_service)
+
+        def generate(*args, **kwargs):
+            other.stop()
+            return 'new.png'
+
+        self.ai_service.generate_image_from_poetry.side_effect = generate
+        result = self.service.run(concurrency=2)
+        self.assertEqual(result['status'], 'stopped')
+        self.assertEqual(result['processed'], 2)
+        self.assertEqual(other.progress['status'], 'stopped')
+
+    def test_admin_disabled_without_token(self):
+        """测试未设置 ADMIN_TOKEN 时本机请求也被拒绝"""
+        client = self.app.test_client()
+        response = client.get('/api/admin/backfill-images', environ_base={'REMOTE_ADDR': '127.0.0.1'})
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('ADMIN_TOKEN', response.get_json()['error'])
+
+    def test_start_rejects_invalid_options(self):
+        """测试补全参数不是正整数时返回400且不启动任务"""
+        self.app.config['ADMIN_TOKEN'] = 'secret'
+        client = self.app.test_client()
+        with mock.patch('poetry_app.routes.admin.threading.Thread') as thread:
+            for body in ({'concurrency': 'abc'}, {'concurrency': True}, {'concurrency': 0},
+                         {'budget': -1}, {'budget': 1.5}, {'reset': 'no'}):
+                response = client.post('/api/admin/backfill-images', json=body,
+                                       headers={'X-Admin-Token': 'secret'})
+                self.assertEqual(response.status_code, 400, body)
+                self.assertFalse(response.get_json()['success'])
+            thread.assert_not_called()
+
+    def test_start_clamps_concurrency(self):
+        """测试并发数超过 BACKFILL_MAX_CONCURRENCY 时按上限运行"""
+        self.app.config['ADMIN_TOKEN'] = 'secret'
+        self.app.config['BACKFILL_MAX_CONCURRENCY'] = 4
+        client = self.app.test_client()
+        with mock.patch('poetry_app.routes.admin.threading.Thread') as thread, \
+                mock.patch('poetry_app.routes.admin.backfill_service.run') as run:
+            response = client.post('/api/admin/backfill-images', json={'concurrency': 100000, 'budget': 3},
+                                   headers={'X-Admin-Token': 'secret'})
+            self.assertEqual(response.status_code, 202)
+            thread.call_args.kwargs['target']()
+        run.assert_called_once_with(concurrency=4, budget=3, reset=False)
+
+if __name__ == '__main__':
+    unittest.main()
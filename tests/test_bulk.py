@@ -0,0 +1,205 @@
+"""
+批量操作与图片清理测试
+"""
+
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+from sqlalchemy import insert
+from config import Config
+from poetry_app import create_app, db
+from poetry_app.models.author import Author
+from poetry_app.models.image_tombstone import ImageTombstone
+from poetry_app.models.poetry import Poetry
+from poetry_app.services.image_sweeper import get_image_sweeper
+from poetry_app.services.poetry_service import PoetryService
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    ADMIN_TOKEN = 'secret'
+    IMAGE_SWEEPER_ENABLED = False
+
+class BulkTestCase(unittest.TestCase):
+    """带临时图片目录的测试基类"""
+
+    config = TestConfig
+
+    def setUp(self):
+        """测试前准备"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.config.UPLOAD_FOLDER = self.tmpdir.name
+        self.app = create_app(self.config)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.poems = [self._add(f'诗{i}', f'image_{i}.png') for i in range(3)]
+
+    def tearDown(self):
+        """测试后清理"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.tmpdir.cleanup()
+
+    def _add(self, title, image_path):
+        with open(self._image(image_path), 'wb') as f:
+            f.write(b'png')
+        poem = Poetry(title=title, content='春眠不觉晓', author='孟浩然', image_path=image_path)
+        db.session.add(poem)
+        db.session.commit()
+        return poem
+
+    def _image(self, image_path):
+        return os.path.join(self.tmpdir.name, image_path)
+
+    def _post(self, url, payload):
+        return self.client.post(url, json=payload, headers={'X-Admin-Token': 'secret'})
+
+class TestBulkOperations(BulkTestCase):
+    """批量操作测试类"""
+
+    def test_bulk_delete_defers_file_removal(self):
+        """测试批量删除在同一事务中写入待删除记录，清理后才删除文件"""
+        ids = [self.poems[0].id, self.poems[1].id, 999]
+        data = self._post('/api/admin/poems/bulk-delete', {'ids': ids}).get_json()
+        self.assertEqual(sorted(data['data']['deleted']), ids[:2])
+        self.assertEqual(data['data']['not_found'], [999])
+
+        self.assertEqual(Poetry.query.count(), 1)
+        self.assertEqual(Author.query.filter_by(name='孟浩然').one().poem_count, 1)
+        self.assertTrue(os.path.exists(self._image('image_0.png')))
+        self.assertEqual(ImageTombstone.query.count(), 2)
+
+        self.assertEqual(get_image_sweeper().sweep(), 2)
+        self.assertFalse(os.path.exists(self._image('image_0.png')))
+        self.assertFalse(os.path.exists(self._image('image_1.png')))
+        self.assertTrue(os.path.exists(self._image('image_2.png')))
+        self.assertEqual(ImageTombstone.query.count(), 0)
+
+    def test_rollback_keeps_image(self):
+        """测试删除回滚时图片和诗词都保留"""
+        service = PoetryService()
+        poem = self.poems[0]
+        service.delete_poetry(poem)
+        db.session.delete(poem)
+        db.session.rollback()
+
+        self.assertEqual(ImageTombstone.query.count(), 0)
+        self.assertEqual(get_image_sweeper().sweep(), 0)
+        self.assertTrue(os.path.exists(self._image('image_0.png')))
+
+    def test_regenerate_discards_old_image_only_on_success(self):
+        """测试重新生成失败时保留旧图片，成功后旧图片进入待删除"""
+        service = PoetryService()
+        service.ai_service = mock.Mock()
+        poem = self.poems[0]
+
+        service.ai_service.generate_image_from_poetry.return_value = None
+        service._regenerate_image(poem)
+        db.session.commit()
+        self.assertEqual(poem.image_path, 'image_0.png')
+        self.assertEqual(ImageTombstone.query.count(), 0)
+
+        service.ai_service.generate_image_from_poetry.return_value = 'new.png'
+        service._regenerate_image(poem)
+        db.session.commit()
+        self.assertEqual(poem.image_path, 'new.png')
+        get_image_sweeper().sweep()
+        self.assertFalse(os.path.exists(self._image('image_0.png')))
+
+    def test_sweeper_skips_images_in_use(self):
+        """测试仍被引用的图片不会被删除"""
+        db.session.add(ImageTombstone(image_path='image_2.png'))
+        db.session.commit()
+        get_image_sweeper().sweep()
+        self.assertTrue(os.path.exists(self._image('image_2.png')))
+        self.assertEqual(ImageTombstone.query.count(), 0)
+
+    def test_bulk_update_is_atomic(self):
+        """测试批量更新全部成功或全部不生效"""
+        first, second = self.poems[0].id, self.poems[1].id
+        response = self._post('/api/admin/poems/bulk-update', {'updates': [
+            {'id': first, 'title': '新标题'},
+            {'id': 999, 'title': '不存在'},
+        ]})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.get_json()['data']['not_found'], [999])
+        db.session.expire_all()
+        self.assertEqual(db.session.get(Poetry, first).title, '诗0')
+
+        response = self._post('/api/admin/poems/bulk-update', {'updates': [
+            {'id': first, 'title': '静夜思', 'content': '床前明月光'},
+            {'id': second, 'author': '李白'},
+        ]})
+        self.assertEqual(response.get_json()['count'], 2)
+        db.session.expire_all()
+        self.assertEqual(db.session.get(Poetry, first).title, '静夜思')
+        self.assertIn('明月', {tag.name for tag in db.session.get(Poetry, first).tags})
+        self.assertEqual(Author.query.filter_by(name='李白').one().poem_count, 1)
+
+    def test_bulk_validation(self):
+        """测试批量请求校验"""
+        self.assertEqual(self._post('/api/admin/poems/bulk-delete', {'ids': []}).status_code, 400)
+        self.assertEqual(self._post('/api/admin/poems/bulk-delete', {'ids': ['1']}).status_code, 400)
+        self.assertEqual(self._post('/api/admin/poems/bulk-delete', {'ids': [True]}).status_code, 400)
+        response = self._post('/api/admin/poems/bulk-update', {'updates': [{'id': True, 'title': '新标题'}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Poetry.query.count(), 3)
+        response = self._post('/api/admin/poems/bulk-update', {'updates': [{'id': self.poems[0].id, 'image_path': 'x'}]})
+        self.assertEqual(response.status_code, 400)
+        response = self._post('/api/admin/poems/bulk-update', {'updates': [{'id': self.poems[0].id, 'title': ' '}]})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/admin/poems/bulk-delete', json={'ids': [1]})
+        self.assertEqual(response.status_code, 403)
+
+class TestBackgroundSweeper(BulkTestCase):
+    """后台清理线程测试类"""
+
+    def setUp(self):
+        """使用文件数据库，后台线程有独立连接"""
+        self.dbdir = tempfile.TemporaryDirectory()
+
+        class SweeperConfig(TestConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(self.dbdir.name, 'test.db')}"
+            IMAGE_SWEEPER_ENABLED = True
+
+        self.config = SweeperConfig
+        super().setUp()
+
+    def tearDown(self):
+        """测试后清理"""
+        super().tearDown()
+        with self.app.app_context():
+            db.engine.dispose()
+        self.dbdir.cleanup()
+
+    def test_start_sweeps_leftover_tombstones(self):
+        """测试启动时处理之前进程遗留的待删除记录"""
+        with open(self._image('leftover.png'), 'wb') as f:
+            f.write(b'png')
+        # 直接写入表中（不经过会话事件），模拟进程退出前没有处理的记录
+        db.session.execute(insert(ImageTombstone).values(image_path='leftover.png'))
+        db.session.commit()
+        self.assertIsNone(get_image_sweeper()._thread)
+
+        get_image_sweeper().start()
+        deadline = time.time() + 5
+        while os.path.exists(self._image('leftover.png')) and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertFalse(os.path.exists(self._image('leftover.png')))
+
+    def test_wakes_after_commit(self):
+        """测试提交后后台线程删除图片"""
+        self._post('/api/admin/poems/bulk-delete', {'ids': [self.poems[0].id]})
+        deadline = time.time() + 5
+        while os.path.exists(self._image('image_0.png')) and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertFalse(os.path.exists(self._image('image_0.png')))
+
+if __name__ == '__main__':
+    unittest.main()
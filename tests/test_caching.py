@@ -0,0 +1,99 @@
+"""
+客户端缓存（Service Worker 和 ETag）测试
+"""
+
+import unittest
+from datetime import datetime
+from config import Config
+from poetry_app import create_app, db
+from poetry_app.models.poetry import Poetry
+from poetry_app.services.author_service import AuthorService
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+
+class TestClientCaching(unittest.TestCase):
+    """客户端缓存测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.poem = Poetry(title='静夜思', content='床前明月光', author='李白')
+        db.session.add(self.poem)
+        db.session.commit()
+
+    def tearDown(self):
+        """测试后清理"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_service_worker_served_from_root(self):
+        """测试 Service Worker 脚本从根路径提供"""
+        response = self.client.get('/sw.js')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/javascript')
+        self.assertEqual(response.headers['Service-Worker-Allowed'], '/')
+        self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+        response.close()
+
+    def test_poem_etag(self):
+        """测试单首诗词的ETag：未修改返回304，修改后或字段不同时ETag改变"""
+        url = f'/api/poems/{self.poem.id}'
+        response = self.client.get(url)
+        etag = response.headers['ETag']
+        self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b'')
+
+        fields_etag = self.client.get(f'{url}?fields=title').headers['ETag']
+        self.assertNotEqual(fields_etag, etag)
+
+        self.poem.title = '夜思'
+        db.session.commit()
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['data']['title'], '夜思')
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+        self.assertEqual(self.client.get('/api/poems/999').status_code, 404)
+
+    def test_poems_list_etag(self):
+        """测试诗词列表的ETag在新增和删除后改变"""
+        etag = self.client.get('/api/poems').headers['ETag']
+        self.assertEqual(self.client.get('/api/poems', headers={'If-None-Match': etag}).status_code, 304)
+
+        db.session.add(Poetry(title='春晓', content='春眠不觉晓', author='孟浩然'))
+        db.session.commit()
+        new_etag = self.client.get('/api/poems').headers['ETag']
+        self.assertNotEqual(new_etag, etag)
+
+        db.session.delete(self.poem)
+        db.session.commit()
+        response = self.client.get('/api/poems', headers={'If-None-Match': new_etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['count'], 1)
+
+    def test_etag_changes_after_author_backfill(self):
+        """测试补全 author_id 后诗词和列表的ETag改变"""
+        db.session.execute(db.update(Poetry).values(author_id=None, updated_at=datetime(2020, 1, 1)))
+        db.session.commit()
+        poem_etag = self.client.get(f'/api/poems/{self.poem.id}').headers['ETag']
+        list_etag = self.client.get('/api/poems').headers['ETag']
+
+        self.assertEqual(AuthorService().backfill(), 1)
+        response = self.client.get(f'/api/poems/{self.poem.id}', headers={'If-None-Match': poem_etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.get_json()['data']['author_id'])
+        self.assertEqual(self.client.get('/api/poems', headers={'If-None-Match': list_etag}).status_code, 200)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+"""
+熔断器测试
+"""
+
+import unittest
+from unittest import mock
+from config import Config
+from poetry_app import create_app, db
+from poetry_app.services.ai_service import AIImageService, get_gemini_breaker
+from poetry_app.utils.circuit_breaker import CircuitBreaker
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    GEMINI_BREAKER_FAILURE_THRESHOLD = 2
+    GEMINI_BREAKER_RECOVERY_TIMEOUT = 30
+    GENERATION_LEDGER_ASYNC = False
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestCircuitBreaker(unittest.TestCase):
+    """熔断器状态测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker('test', failure_threshold=3, recovery_timeout=10, clock=self.clock)
+
+    def _fail(self, times):
+        for _ in range(times):
+            self.assertTrue(self.breaker.allow_request())
+            self.breaker.record_failure(ConnectionError('down'))
+
+    def test_opens_after_consecutive_failures(self):
+        """测试连续失败达到阈值后熔断，成功会清零计数"""
+        self._fail(2)
+        self.breaker.record_success()
+        self._fail(2)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+        self._fail(1)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow_request())
+        snapshot = self.breaker.snapshot()
+        self.assertEqual(snapshot['rejected_calls'], 1)
+        self.assertEqual(snapshot['retry_after_seconds'], 10)
+        # 只公开异常类型，不包含异常信息
+        self.assertEqual(snapshot['last_error'], 'ConnectionError')
+
+    def test_half_open_single_probe(self):
+        """测试半开状态只放行一个探测请求"""
+        self._fail(3)
+        self.clock.now = 10
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())
+
+        # 探测失败重新熔断
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+        # 探测成功恢复
+        self.clock.now = 20
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_lost_probe_is_replaced(self):
+        """测试探测请求长时间无结果时允许新的探测"""
+        self._fail(3)
+        self.clock.now = 10
+        self.assertTrue(self.breaker.allow_request())
+        self.clock.now = 20
+        self.assertTrue(self.breaker.allow_request())
+
+class TestGeminiBreaker(unittest.TestCase):
+    """图片生成熔断测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.service = AIImageService()
+        self.service.api_key = 'test-key'
+
+    def tearDown(self):
+        """测试后清理"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_fails_fast_when_open(self):
+        """测试连续连接失败后不再调用 Gemini"""
+        with mock.patch.object(self.service, '_generate_image_attempt', side_effect=ConnectionError('proxy down')) as attempt:
+            self.assertIsNone(self.service.generate_image_from_poetry('床前明月光'))
+            self.assertIsNone(self.service.generate_image_from_poetry('床前明月光'))
+            self.assertEqual(attempt.call_count, 2)
+
+            # 其他服务实例共享同一个熔断器
+            other = AIImageService()
+            other.api_key = 'test-key'
+            with mock.patch.object(other, '_generate_image_attempt') as other_attempt:
+                self.assertIsNone(other.generate_image_from_poetry('床前明月光'))
+                other_attempt.assert_not_called()
+
+        self.assertEqual(get_gemini_breaker().state, CircuitBreaker.OPEN)
+        data = self.client.get('/api/stats').get_json()['data']['image_service']
+        self.assertEqual(data['state'], 'open')
+        self.assertEqual(data['rejected_calls'], 1)
+
+    def test_quota_errors_do_not_open(self):
+        """测试配额错误不计入熔断"""
+        error = Exception('429 RESOURCE_EXHAUSTED')
+        with mock.patch.object(self.service, '_generate_image_attempt', side_effect=error):
+            for _ in range(3):
+                self.service.generate_image_from_poetry('床前明月光', max_retries=1)
+        self.assertEqual(get_gemini_breaker().state, CircuitBreaker.CLOSED)
+
+    def test_status_page(self):
+        """测试状态页面显示熔断信息"""
+        response = self.client.get('/api-status')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('熔断状态', response.get_data(as_text=True))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+"""
+图片生成调用记录测试
+"""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+from config import Config
+from poetry_app import create_app, db
+from poetry_app.models.generation_attempt import GenerationAttempt
+from poetry_app.services.ai_service import AIImageService
+from poetry_app.services.generation_ledger import GenerationLedger, get_generation_ledger
+
+class TestConfig(Config):
+    TESTING = True
+    ADMIN_TOKEN = 'secret'
+    GENERATION_LEDGER_FLUSH_INTERVAL = 0.05
+
+class TestGenerationLedger(unittest.TestCase):
+    """图片生成调用记录测试类"""
+
+    def setUp(self):
+        """测试前准备（文件数据库，后台写入线程有独立连接）"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        TestConfig.SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(self.tmpdir.name, 'test.db')}"
+        TestConfig.UPLOAD_FOLDER = self.tmpdir.name
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.service = AIImageService()
+        self.service.api_key = 'test-key'
+        self.ledger = get_generation_ledger()
+
+    def tearDown(self):
+        """测试后清理"""
+        self.ledger.flush()
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+        self.app_context.pop()
+        self.tmpdir.cleanup()
+
+    def _fake_image(self):
+        with open(os.path.join(self.tmpdir.name, 'a.png'), 'wb') as f:
+            f.write(b'x' * 10)
+        return 'a.png'
+
+    def _attempts(self):
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            attempts = GenerationAttempt.query.order_by(GenerationAttempt.id).all()
+            if len(attempts) >= 2:
+                return attempts
+            db.session.remove()
+            time.sleep(0.05)
+        return GenerationAttempt.query.order_by(GenerationAttempt.id).all()
+
+    def test_attempts_written_in_background(self):
+        """测试每次调用（包括重试）都异步写入一条记录"""
+        responses = [Exception('429 RESOURCE_EXHAUSTED retryDelay: 7s'), None]
+
+        def attempt(*args):
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return self._fake_image()
+
+        with mock.patch.object(self.service, '_generate_image_attempt', side_effect=attempt), \
+                mock.patch('poetry_app.services.ai_service.time.sleep') as sleep:
+            self.assertEqual(self.service.generate_image_from_poetry('床前明月光', '静夜思'), 'a.png')
+            sleep.assert_called_once_with(7)
+
+        first, second = self._attempts()
+        self.assertEqual(first.prompt_hash, second.prompt_hash)
+        self.assertEqual(first.model, AIImageService.MODEL)
+        self.assertFalse(first.success)
+        self.assertTrue(first.quota_limited)
+        self.assertEqual(first.error_class, 'Exception')
+        self.assertEqual(first.retry_count, 0)
+
+        self.assertTrue(second.success)
+        self.assertEqual(second.retry_count, 1)
+        self.assertEqual(second.waited_seconds, 7)
+        self.assertEqual(second.bytes_received, 10)
+        self.assertGreaterEqual(second.finished_at, second.started_at)
+
+    def test_batch_written_within_flush_interval(self):
+        """测试记录持续到达时，每批从第一条起 flush_interval 秒内写入"""
+        ledger = GenerationLedger(self.app, batch_size=1000, flush_interval=0.2)
+        writes = []
+
+        def write(batch):
+            writes.append(time.monotonic())
+            for _ in batch:
+                ledger._queue.task_done()
+
+        started = time.monotonic()
+        with mock.patch.object(ledger, '_write', side_effect=write):
+            while time.monotonic() - started < 1.0:
+                ledger.record(prompt_hash='x')
+                time.sleep(0.05)
+            self.assertTrue(ledger.flush())
+
+        self.assertGreater(len(writes), 1)
+        self.assertLess(writes[0] - started, 0.6)
+
+    def test_flush_wait_is_bounded(self):
+        """测试后台批次写入卡住时 flush() 超时返回"""
+        ledger = GenerationLedger(self.app, flush_interval=0.01)
+        release = threading.Event()
+
+        def write(batch):
+            release.wait(5)
+            for _ in batch:
+                ledger._queue.task_done()
+
+        with mock.patch.object(ledger, '_write', side_effect=write):
+            ledger.record(prompt_hash='x')
+            while not ledger._queue.empty():
+                time.sleep(0.01)
+
+            started = time.monotonic()
+            self.assertFalse(ledger.flush(timeout=0.1))
+            self.assertLess(time.monotonic() - started, 1)
+            release.set()
+            self.assertTrue(ledger.flush())
+
+    def test_generation_stats(self):
+        """测试统计接口的百分位数、成功率和分桶"""
+        now = datetime.utcnow()
+        for i in range(10):
+            self.ledger.record(
+                prompt_hash='h', model='m', started_at=now - timedelta(minutes=i * 10),
+                finished_at=now, duration_ms=float((i + 1) * 100), bytes_received=0,
+                retry_count=1 if i < 2 else 0, success=i % 2 == 0,
+                error_class=None if i % 2 == 0 else 'ConnectError',
+                quota_limited=False, waited_seconds=0,
+            )
+        # 窗口之外的记录不计入
+        self.ledger.record(
+            prompt_hash='h', model='m', started_at=now - timedelta(days=2), finished_at=now,
+            duration_ms=1.0, bytes_received=0, retry_count=0, success=True,
+            error_class=None, quota_limited=False, waited_seconds=0,
+        )
+
+        response = self.client.get('/api/admin/generation-stats?hours=2&bucket_minutes=60',
+                                   headers={'X-Admin-Token': 'secret'})
+        data = response.get_json()['data']
+        summary = data['summary']
+        self.assertEqual(summary['attempts'], 10)
+        self.assertEqual(summary['success_rate'], 0.5)
+        self.assertEqual(summary['retry_rate'], 0.2)
+        self.assertEqual(summary['latency_ms']['p50'], 500.0)
+        self.assertEqual(summary['latency_ms']['p95'], 1000.0)
+        self.assertEqual(summary['errors'], {'ConnectError': 5})
+        self.assertEqual(sum(bucket['attempts'] for bucket in data['buckets']), 10)
+        self.assertEqual(len(data['buckets']), 2)
+
+        self.assertEqual(self.client.get('/api/admin/generation-stats').status_code, 403)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+"""
+生成配图接口限流测试
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+from config import Config
+from poetry_app import create_app, db
+from poetry_app.models.poetry import Poetry
+from poetry_app.routes import poetry as poetry_routes
+from poetry_app.utils.rate_limiter import SlidingWindowRateLimiter
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    RATE_LIMITS = {
+        'poetry.create': (2, 60),
+        'poetry.regenerate_image': (1, 60),
+    }
+
+class TestSlidingWindowRateLimiter(unittest.TestCase):
+    """滑动窗口限流器测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'rate_limits.db')
+        self.now = 1000.0
+        self.limiter = SlidingWindowRateLimiter(self.path, clock=lambda: self.now)
+
+    def tearDown(self):
+        """测试后清理"""
+        self.tmpdir.cleanup()
+
+    def test_sliding_window(self):
+        """测试窗口内超过上限被拒绝，最早的记录过期后恢复"""
+        self.assertEqual(self.limiter.hit('a', 2, 60), 0)
+        self.now += 30
+        self.assertEqual(self.limiter.hit('a', 2, 60), 0)
+        self.now += 10
+        self.assertEqual(self.limiter.hit('a', 2, 60), 20)
+        # 其他客户端不受影响
+        self.assertEqual(self.limiter.hit('b', 2, 60), 0)
+
+        self.now += 20
+        self.assertEqual(self.limiter.hit('a', 2, 60), 0)
+        self.assertEqual(self.limiter.hit('a', 2, 60), 30)
+
+    def test_storage_created_on_first_hit(self):
+        """测试创建限流器时不创建存储文件，第一次记录请求时才创建"""
+        path = os.path.join(self.tmpdir.name, 'instance', 'rate_limits.db')
+        limiter = SlidingWindowRateLimiter(path, clock=lambda: self.now)
+        self.assertFalse(os.path.exists(os.path.dirname(path)))
+
+        self.assertEqual(limiter.hit('a', 1, 60), 0)
+        self.assertTrue(os.path.exists(path))
+
+    def test_shared_between_instances(self):
+        """测试多个进程（实例）使用同一文件时共享计数"""
+        other = SlidingWindowRateLimiter(self.path, clock=lambda: self.now)
+        self.assertEqual(self.limiter.hit('a', 2, 60), 0)
+        self.assertEqual(other.hit('a', 2, 60), 0)
+        self.assertEqual(self.limiter.hit('a', 2, 60), 60)
+
+class TestRateLimitedRoutes(unittest.TestCase):
+    """接口限流测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        TestConfig.RATE_LIMIT_STORAGE_PATH = os.path.join(self.tmpdir.name, 'rate_limits.db')
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        """测试后清理"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.tmpdir.cleanup()
+
+    def _create(self, client, remote_addr='10.0.0.1'):
+        return client.post('/poetry/create', data={'title': '春晓', 'content': ''},
+                           environ_base={'REMOTE_ADDR': remote_addr})
+
+    def test_create_limited_per_client(self):
+        """测试同一IP超过上限返回429，其他IP和GET请求不受影响"""
+        self.assertEqual(self._create(self.client).status_code, 200)
+        self.assertEqual(self._create(self.client).status_code, 200)
+
+        response = self._create(self.client)
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response.headers['Retry-After']), 0)
+        self.assertIn('提交过于频繁', response.get_data(as_text=True))
+
+        self.assertEqual(self._create(self.client, '10.0.0.2').status_code, 200)
+        self.assertEqual(self.client.get('/poetry/create').status_code, 200)
+
+    def test_session_key(self):
+        """测试按会话限流时不同会话分别计数"""
+        self.app.config['RATE_LIMIT_KEY'] = 'session'
+        for _ in range(2):
+            self._create(self.client)
+        self.assertEqual(self._create(self.client).status_code, 429)
+        self.assertEqual(self._create(self.app.test_client()).status_code, 200)
+
+    def test_regenerate_returns_json(self):
+        """测试重新生成配图超过上限返回JSON错误"""
+        poem = Poetry(title='静夜思', content='床前明月光', author='李白')
+        db.session.add(poem)
+        db.session.commit()
+
+        ai_service = poetry_routes.poetry_service.ai_service
+        with mock.patch.object(ai_service, 'generate_image_from_poetry', return_value=None):
+            self.assertEqual(self.client.post(f'/poetry/{poem.id}/regenerate-image').status_code, 200)
+            response = self.client.post(f'/poetry/{poem.id}/regenerate-image')
+
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(response.get_json()['success'])
+        self.assertIn('Retry-After', response.headers)
+
+    def test_disabled(self):
+        """测试关闭限流"""
+        self.app.config['RATE_LIMIT_ENABLED'] = False
+        for _ in range(3):
+            self.assertEqual(self._create(self.client).status_code, 200)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+读写分离测试
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from config import Config
+from poetry_app import create_app, db
+from poetry_app.models.poetry import Poetry
+from poetry_app.routes import poetry as poetry_routes
+
+class TestReadWriteSplit(unittest.TestCase):
+    """使用本地SQLite副本测试读写分离"""
+
+    def setUp(self):
+        """测试前准备：主库一首诗，复制为副本后主库再写入一首"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        primary_path = os.path.join(self.tmpdir.name, 'primary.db')
+        replica_path = os.path.join(self.tmpdir.name, 'replica.db')
+
+        class ReplicaConfig(Config):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{primary_path}'
+            SQLALCHEMY_REPLICA_URIS = [f'sqlite:///{replica_path}']
+            RATE_LIMIT_STORAGE_PATH = os.path.join(self.tmpdir.name, 'rate_limits.db')
+
+        self.app = create_app(ReplicaConfig)
+        with self.app.app_context():
+            db.create_all()
+            db.session.add(Poetry(title='静夜思', content='床前明月光'))
+            db.session.commit()
+            db.session.remove()
+            db.engine.dispose()
+            shutil.copy(primary_path, replica_path)
+
+            db.session.add(Poetry(title='春晓', content='春眠不觉晓'))
+            db.session.commit()
+            db.session.remove()
+
+    def tearDown(self):
+        """测试后清理"""
+        with self.app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
+        self.tmpdir.cleanup()
+
+    def test_get_reads_from_replica(self):
+        """测试GET请求读取副本"""
+        response = self.app.test_client().get('/api/poems')
+        self.assertEqual(response.get_json()['count'], 1)
+
+    def test_read_your_writes_after_create(self):
+        """测试创建后同一会话读取主库"""
+        client = self.app.test_client()
+        ai_service = poetry_routes.poetry_service.ai_service
+        with mock.patch.object(ai_service, 'generate_image_from_poetry', return_value=None):
+            client.post('/poetry/create', data={'title': '登鹳雀楼', 'content': '白日依山尽'})
+
+        self.assertEqual(client.get('/api/poems').get_json()['count'], 3)
+        # 其他会话仍然读取副本
+        self.assertEqual(self.app.test_client().get('/api/poems').get_json()['count'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
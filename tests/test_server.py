@@ -0,0 +1,88 @@
+"""
+生产服务器配置测试
+"""
+
+import sys
+import unittest
+from unittest import mock
+from config import Config
+from poetry_app import create_app
+from poetry_app import server
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SERVER_BIND = '127.0.0.1:9000'
+    SERVER_WORKERS = 3
+    SERVER_MAX_REQUESTS = 500
+    IMAGE_SWEEPER_ENABLED = False
+
+class TestServerOptions(unittest.TestCase):
+    """Gunicorn 参数测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.app = create_app(TestConfig)
+
+    def test_options_from_config(self):
+        """测试从配置生成参数，命令行参数覆盖配置"""
+        options = server.gunicorn_options(self.app.config, workers=None, threads=8)
+        self.assertEqual(options['bind'], '127.0.0.1:9000')
+        self.assertEqual(options['workers'], 3)
+        self.assertEqual(options['threads'], 8)
+        self.assertEqual(options['worker_class'], 'gthread')
+        self.assertEqual(options['max_requests'], 500)
+        self.assertTrue(options['preload_app'])
+
+    def test_default_worker_count(self):
+        """测试 worker 数量为0时按 CPU 核数计算"""
+        self.app.config['SERVER_WORKERS'] = 0
+        with mock.patch('poetry_app.server.multiprocessing.cpu_count', return_value=2):
+            self.assertEqual(server.gunicorn_options(self.app.config)['workers'], 5)
+
+    def test_gevent_requires_package(self):
+        """测试未安装 gevent 时给出明确错误"""
+        with mock.patch('poetry_app.server.importlib.util.find_spec', return_value=None):
+            with self.assertRaises(RuntimeError):
+                server.gunicorn_options(self.app.config, worker_class='gevent')
+
+    def test_gevent_requires_early_patch(self):
+        """测试导入应用之前没有打 gevent 补丁时拒绝启动"""
+        gevent = mock.Mock()
+        with mock.patch('poetry_app.server.importlib.util.find_spec', return_value=mock.Mock()), \
+                mock.patch.dict(sys.modules, {'gevent': gevent, 'gevent.monkey': gevent.monkey}):
+            gevent.monkey.is_module_patched.return_value = False
+            with self.assertRaises(RuntimeError):
+                server.gunicorn_options(self.app.config, worker_class='gevent')
+
+            gevent.monkey.is_module_patched.return_value = True
+            options = server.gunicorn_options(self.app.config, worker_class='gevent')
+            self.assertEqual(options['worker_class'], 'gevent')
+            self.assertTrue(options['preload_app'])
+
+    def test_post_fork_disposes_engines(self):
+        """测试 worker 启动后丢弃继承的数据库连接并启动图片清理线程"""
+        engine = mock.Mock()
+        arbiter = mock.Mock()
+        arbiter.app.application = self.app
+        with mock.patch.object(server.db.__class__, 'engines', new_callable=mock.PropertyMock,
+                               return_value={None: engine}), \
+                mock.patch.object(self.app.extensions['image_sweeper'], 'start') as start:
+            server.post_fork(arbiter, mock.Mock())
+        engine.dispose.assert_called_once_with(close=False)
+        start.assert_called_once_with()
+
+    @unittest.skipIf(server.BaseApplication is object, '未安装 gunicorn')
+    def test_application_config(self):
+        """测试参数写入 Gunicorn 配置并返回预先创建的应用"""
+        options = server.gunicorn_options(self.app.config)
+        application = server.PoetryServer(self.app, options)
+        self.assertEqual(application.cfg.bind, ['127.0.0.1:9000'])
+        self.assertEqual(application.cfg.workers, 3)
+        self.assertTrue(application.cfg.preload_app)
+        self.assertIs(application.cfg.post_fork, server.post_fork)
+        with mock.patch('poetry_app.server.gc'):
+            self.assertIs(application.load(), self.app)
+
+if __name__ == '__main__':
+    unittest.main()
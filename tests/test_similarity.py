@@ -0,0 +1,91 @@
+"""
+相似诗词索引测试
+"""
+
+import tempfile
+import unittest
+from config import Config
+from poetry_app import create_app, db
+from poetry_app.models.poetry import Poetry
+from poetry_app.services.similarity_service import get_similarity_index
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+
+class TestSimilarityIndex(unittest.TestCase):
+    """相似度索引测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        TestConfig.SIMILARITY_INDEX_DIR = self.tmpdir.name
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.moon = self._add('静夜思', '床前明月光，疑是地上霜。举头望明月，低头思故乡。')
+        self.moon2 = self._add('月夜忆舍弟', '露从今夜白，月是故乡明。')
+        self.spring = self._add('春晓', '春眠不觉晓，处处闻啼鸟。夜来风雨声，花落知多少。')
+        self.index = get_similarity_index()
+
+    def tearDown(self):
+        """测试后清理"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.tmpdir.cleanup()
+
+    def _add(self, title, content):
+        poem = Poetry(title=title, content=content)
+        db.session.add(poem)
+        db.session.commit()
+        return poem
+
+    def test_similar_requires_built_index(self):
+        """测试索引未构建时查询不触发构建，构建后按相似度排序"""
+        self.assertEqual(self.index.similar(self.moon.id, k=2), [])
+        self.assertFalse(self.index.exists())
+        self.assertEqual(self.client.get(f'/api/poems/{self.moon.id}/similar').status_code, 503)
+
+        self.index.build()
+        result = self.index.similar(self.moon.id, k=2)
+        self.assertEqual(result[0][0], self.moon2.id)
+        self.assertNotIn(self.moon.id, [poem_id for poem_id, _ in result])
+
+    def test_incremental_updates(self):
+        """测试新增、编辑、删除后增量更新索引"""
+        self.index.build()
+
+        new_poem = self._add('望月怀远', '海上生明月，天涯共此时。')
+        self.assertIn(new_poem.id, [poem_id for poem_id, _ in self.index.similar(self.moon.id, k=5)])
+
+        self.spring.content = '明月出天山，苍茫云海间。'
+        db.session.commit()
+        self.assertIn(self.spring.id, [poem_id for poem_id, _ in self.index.similar(self.moon.id, k=5)])
+
+        db.session.delete(new_poem)
+        db.session.commit()
+        self.assertNotIn(new_poem.id, [poem_id for poem_id, _ in self.index.similar(self.moon.id, k=5)])
+        self.assertEqual(self.index.similar(new_poem.id), [])
+
+    def test_grows_beyond_capacity(self):
+        """测试超出初始容量后扩容"""
+        self.index.build()
+        for i in range(70):
+            db.session.add(Poetry(title=f'明月{i}', content='明月几时有'))
+        db.session.commit()
+        self.assertEqual(len(self.index.similar(self.moon.id, k=80)), 72)
+
+    def test_similar_endpoint(self):
+        """测试相似诗词接口"""
+        self.index.build()
+        data = self.client.get(f'/api/poems/{self.moon.id}/similar?k=1').get_json()
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['data'][0]['title'], '月夜忆舍弟')
+        self.assertGreater(data['data'][0]['score'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+列表页流式输出测试
+"""
+
+import unittest
+from config import Config
+from poetry_app import create_app, db
+from poetry_app.models.poetry import Poetry
+from poetry_app.services.poetry_service import PoetryService
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+
+class TestStreamedIndex(unittest.TestCase):
+    """首页流式输出测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        """测试后清理"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _add_poems(self, count):
+        for i in range(count):
+            db.session.add(Poetry(title=f'春日{i}', content='春眠不觉晓', author='孟浩然'))
+        db.session.commit()
+
+    def test_iter_poems_in_batches(self):
+        """测试按批读取全部诗词和搜索结果"""
+        self._add_poems(25)
+        db.session.add(Poetry(title='静夜思', content='床前明月光', author='李白'))
+        db.session.commit()
+
+        self.assertEqual(len(list(PoetryService.iter_poems(list_view=True, batch_size=10))), 26)
+        titles = [poem.title for poem in PoetryService.iter_poems('明月', list_view=True, batch_size=10)]
+        self.assertEqual(titles, ['静夜思'])
+
+    def test_index_is_streamed(self):
+        """测试首页以流式响应输出全部卡片"""
+        self._add_poems(30)
+        response = self.client.get('/')
+        self.assertTrue(response.is_streamed)
+
+        chunks = list(response.response)
+        self.assertGreater(len(chunks), 1)
+        html = ''.join(chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk for chunk in chunks)
+        self.assertEqual(html.count('poetry-title'), 30)
+        self.assertNotIn('还没有创作任何诗词', html)
+
+        html = self.client.get('/?search=没有这首').get_data(as_text=True)
+        self.assertIn('还没有创作任何诗词', html)
+
+    def test_flash_messages_consumed(self):
+        """测试流式页面显示闪现消息后不会重复显示"""
+        with self.client.session_transaction() as session:
+            session['_flashes'] = [('success', '诗词删除成功！')]
+
+        self.assertIn('诗词删除成功！', self.client.get('/').get_data(as_text=True))
+        self.assertNotIn('诗词删除成功！', self.client.get('/').get_data(as_text=True))
+
+if __name__ == '__main__':
+    unittest.main()
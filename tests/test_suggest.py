@@ -0,0 +1,119 @@
+"""
+搜索建议索引测试
+"""
+
+import threading
+import unittest
+from unittest import mock
+from config import Config
+from poetry_app import create_app, db
+from poetry_app.models.poetry import Poetry
+from poetry_app.services.suggest_service import get_suggest_index
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+
+class TestSuggestIndex(unittest.TestCase):
+    """搜索建议索引测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.spring = self._add('春晓', '孟浩然')
+        self._add('春夜喜雨', '杜甫')
+        self._add('静夜思', '李白')
+        self.index = get_suggest_index()
+
+    def tearDown(self):
+        """测试后清理"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _add(self, title, author):
+        poem = Poetry(title=title, content='内容', author=author)
+        db.session.add(poem)
+        db.session.commit()
+        return poem
+
+    def _texts(self, prefix, limit=8):
+        return [item['text'] for item in self.index.suggest(prefix, limit)]
+
+    def test_prefix_lookup(self):
+        """测试首次查询时构建索引并按前缀匹配标题和作者"""
+        self.assertFalse(self.index.built)
+        self.assertEqual(self._texts('春'), ['春夜喜雨', '春晓'])
+        self.assertTrue(self.index.built)
+        self.assertEqual(self.index.suggest('李'), [{'text': '李白', 'type': 'author', 'id': None}])
+        self.assertEqual(self._texts('春', limit=1), ['春夜喜雨'])
+        self.assertEqual(self._texts('秋'), [])
+        self.assertEqual(self._texts('  '), [])
+
+    def test_incremental_updates(self):
+        """测试新增、编辑、删除后增量更新索引"""
+        self.index.build()
+
+        self._add('春望', '杜甫')
+        self.assertIn('春望', self._texts('春'))
+
+        self.spring.title = '晓起'
+        db.session.commit()
+        self.assertNotIn('春晓', self._texts('春'))
+        self.assertEqual(self._texts('晓'), ['晓起'])
+
+        # 作者还有其他诗词时保留作者建议
+        db.session.delete(Poetry.query.filter_by(title='春望').one())
+        db.session.commit()
+        self.assertEqual(self._texts('杜'), ['杜甫'])
+
+        db.session.delete(self.spring)
+        db.session.commit()
+        self.assertEqual(self._texts('孟'), [])
+
+    def test_bounded_entries(self):
+        """测试超过最大条目数时淘汰最早的诗词"""
+        self.index.max_entries = 6
+        self.index.build()
+        self._add('春江花月夜', '张若虚')
+        self.assertNotIn('春晓', self._texts('春'))
+        self.assertIn('春江花月夜', self._texts('春'))
+
+    def test_expired_index_rebuilt_once_in_background(self):
+        """测试索引过期后只有一个后台线程重建，重建期间继续使用旧数组"""
+        self.index.build()
+        self.index._built_at -= self.index.ttl + 1
+        release = threading.Event()
+        calls = []
+
+        def slow_build():
+            calls.append(1)
+            release.wait(5)
+
+        with mock.patch.object(self.index, 'build', side_effect=slow_build):
+            for _ in range(5):
+                self.assertEqual(self._texts('静'), ['静夜思'])
+            release.set()
+            for thread in threading.enumerate():
+                if thread.name == 'suggest-index-build':
+                    thread.join(5)
+        self.assertEqual(len(calls), 1)
+        self.assertFalse(self.index._build_lock.locked())
+
+    def test_suggest_endpoint(self):
+        """测试搜索建议接口"""
+        data = self.client.get('/api/suggest?q=静').get_json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['data'][0]['id'], Poetry.query.filter_by(title='静夜思').one().id)
+        self.assertIn('took_ms', data)
+
+        self.assertEqual(self.client.get('/api/suggest').get_json()['data'], [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+"""
+标签索引测试
+"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+from config import Config
+from poetry_app import create_app, db
+from poetry_app.models.poetry import Poetry
+from poetry_app.models.tag import Tag
+from poetry_app.routes import poetry as poetry_routes
+from poetry_app.services.poetry_service import PoetryService
+from poetry_app.utils.helpers import extract_keywords
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+
+class TestExtractKeywords(unittest.TestCase):
+    """关键词提取测试类"""
+
+    def test_cjk_ngrams(self):
+        """测试无空格中文按单字和双字切分，过滤虚词"""
+        keywords = extract_keywords('举头望明月，低头思故乡。', max_keywords=20)
+        self.assertIn('月', keywords)
+        self.assertIn('明月', keywords)
+        self.assertIn('故乡', keywords)
+        # 双字不跨越标点
+        self.assertNotIn('月低', keywords)
+
+        self.assertNotIn('不', extract_keywords('春眠不觉晓', max_keywords=20))
+
+    def test_frequency_order(self):
+        """测试按出现次数排序"""
+        self.assertEqual(extract_keywords('月月月 春', max_keywords=1), ['月'])
+        self.assertEqual(extract_keywords('hello world hello', max_keywords=2), ['hello', 'world'])
+
+class TestTagIndex(unittest.TestCase):
+    """标签索引测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.service = PoetryService()
+        self.service.ai_service = mock.Mock()
+        self.service.ai_service.generate_image_from_poetry.return_value = None
+
+        self.poem = self.service.create_poetry('静夜思', '床前明月光，疑是地上霜。举头望明月，低头思故乡。', '李白')
+        db.session.add(self.poem)
+        db.session.add(self.service.create_poetry('春晓', '春眠不觉晓，处处闻啼鸟。', '孟浩然'))
+        db.session.add(self.service.create_poetry('春夜喜雨', '好雨知时节，当春乃发生。', '杜甫'))
+        db.session.commit()
+
+    def tearDown(self):
+        """测试后清理"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_tags_written_on_create(self):
+        """测试创建时写入标签，同名标签只保存一份"""
+        names = {tag.name for tag in self.poem.tags}
+        self.assertTrue({'月', '明月', '故乡'} <= names)
+        self.assertEqual(Tag.query.filter_by(name='春').count(), 1)
+
+    def test_tag_lookup_and_facets(self):
+        """测试按标签查询和标签统计"""
+        data = self.client.get('/api/tags/春?fields=title').get_json()
+        self.assertEqual(data['total'], 2)
+        self.assertEqual([poem['title'] for poem in data['data']], ['春夜喜雨', '春晓'])
+
+        data = self.client.get('/api/tags/春?per_page=1&page=2').get_json()
+        self.assertEqual(data['count'], 1)
+
+        facets = {tag['name']: tag['count'] for tag in self.client.get('/api/tags').get_json()['data']}
+        self.assertEqual(facets['春'], 2)
+
+        self.assertEqual(self.client.get('/api/tags/不存在').get_json()['total'], 0)
+        self.assertEqual(self.client.get('/api/tags?limit=-5').get_json()['count'], 1)
+
+    def test_long_words_not_tagged(self):
+        """测试超过标签列长度的词不作为标签"""
+        long_word = 'a' * 80
+        poem = self.service.create_poetry('长词', f'{long_word} moon 月', '佚名')
+        names = {tag.name for tag in poem.tags}
+        self.assertNotIn(long_word, names)
+        self.assertTrue({'moon', '月'} <= names)
+
+    def test_tags_updated_on_edit(self):
+        """测试编辑后重新生成标签"""
+        self.service.update_poetry(self.poem, '登鹳雀楼', '白日依山尽，黄河入海流。', '王之涣')
+        db.session.commit()
+
+        self.assertEqual(self.client.get('/api/tags/明月').get_json()['total'], 0)
+        self.assertEqual(self.client.get('/api/tags/黄河').get_json()['total'], 1)
+
+class TestNoWriteLockDuringImageGeneration(unittest.TestCase):
+    """生成配图期间不占用数据库写锁测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'test.db')
+
+        class FileConfig(TestConfig):
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{self.path}'
+            RATE_LIMIT_ENABLED = False
+
+        self.app = create_app(FileConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.poem = Poetry(title='静夜思', content='床前明月光，疑是地上霜。', author='李白')
+        db.session.add(self.poem)
+        db.session.commit()
+        self.writable = []
+
+    def tearDown(self):
+        """测试后清理"""
+        db.session.remove()
+        db.engine.dispose()
+        self.app_context.pop()
+        self.tmpdir.cleanup()
+
+    def _generate_image(self, content, title):
+        # 模拟其他进程在生成配图期间写入：不等待锁，有写事务未结束时立即失败
+        conn = sqlite3.connect(self.path, timeout=0)
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('ROLLBACK')
+            self.writable.append(True)
+        except sqlite3.OperationalError:
+            self.writable.append(False)
+        finally:
+            conn.close()
+        return None
+
+    def test_create_and_edit(self):
+        """测试创建和编辑诗词时，调用AI接口期间其他连接可以写入"""
+        ai_service = poetry_routes.poetry_service.ai_service
+        with mock.patch.object(ai_service, 'generate_image_from_poetry', side_effect=self._generate_image):
+            self.client.post('/poetry/create', data={'title': '春晓', 'content': '春眠不觉晓，处处闻啼鸟。'})
+            self.client.post(f'/poetry/{self.poem.id}/edit',
+                             data={'title': '静夜思', 'content': '举头望明月，低头思故乡。', 'author': '李白'})
+
+        self.assertEqual(self.writable, [True, True])
+        db.session.expire_all()
+        self.assertEqual(self.client.get('/api/tags/春晓').get_json()['total'], 1)
+        self.assertEqual(self.client.get('/api/tags/故乡').get_json()['total'], 1)
+
+if __name__ == '__main__':
+    unittest.main()